@@ -2,7 +2,8 @@ from cProfile import label
 import streamlit as st
 from ls_ui.theme import apply_theme
 from ls_ui.chrome import render_header, render_footer
-from ls_ui.env import PUBLIC_MODE
+from ls_ui.env import PUBLIC_MODE, WARMUP_MODELS, SENTIMENT_BACKEND, MODEL_CACHE_DIR, JIEBA_CACHE_DIR
+from ls_nlp.warmup import start_warmup
 from utils import tighten_bloc_container
 from i18n.translator import t
 
@@ -19,6 +20,22 @@ st.set_page_config(
     }
 )
 
+# Warm up models in the background (once per process), so the first visitor
+# after a deploy does not pay the model load inside their request.
+def warm_up_sentiment_model():
+    from ls_nlp.sentiment import SENTIMENT_MODEL, warm_up_sentiment  # heavy import, keep off the main thread
+    from ls_nlp.langid import detect_language
+    detect_language("Warm-up sentence.")  # loads the language profiles
+    warm_up_sentiment(SENTIMENT_MODEL, SENTIMENT_BACKEND, MODEL_CACHE_DIR)
+
+def warm_up_jieba():
+    from ls_nlp.segmentation import init_jieba
+    init_jieba(JIEBA_CACHE_DIR)
+
+if WARMUP_MODELS:
+    start_warmup("sentiment", warm_up_sentiment_model)
+    start_warmup("jieba", warm_up_jieba)
+
 # logo
 st.logo("ls_ui/assets/logo_dark.png", icon_image="ls_ui/assets/icon_2.png", size="large")
 
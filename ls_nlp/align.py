@@ -0,0 +1,117 @@
+# align.py
+# Length-based sentence alignment (Gale & Church, 1993) restricted to a diagonal band.
+# Supports 1-1, 1-2, 2-1, 1-0 and 0-1 beads; cost is the negative log probability
+# of the length ratio under a normal model plus the bead prior.
+import math
+
+# Bead priors from Gale & Church.
+BEAD_PRIORS = {
+    (1, 1): 0.89,
+    (1, 0): 0.0099,
+    (0, 1): 0.0099,
+    (2, 1): 0.089,
+    (1, 2): 0.089,
+}
+VARIANCE = 6.8
+DEFAULT_BAND = 30
+
+
+def _norm_sf(z: float) -> float:
+    """P(|Z| >= z) for a standard normal."""
+    return math.erfc(z / math.sqrt(2))
+
+
+_BEADS = [(bead, -math.log(prior)) for bead, prior in BEAD_PRIORS.items()]
+
+
+def _bead_cost(src_len: int, tgt_len: int, ratio: float, prior_cost: float) -> float:
+    if src_len == 0 and tgt_len == 0:
+        return 0.0
+    mean = (src_len + tgt_len / ratio) / 2
+    z = abs(ratio * src_len - tgt_len) / math.sqrt(VARIANCE * mean)
+    prob = max(_norm_sf(z), 1e-12)
+    return prior_cost - math.log(prob)
+
+
+def align_lengths(src_lens: list[int], tgt_lens: list[int], band: int | None = None):
+    """
+    Dynamic-programming alignment over sentence lengths.
+    Only cells within `band` of the (rescaled) diagonal are explored, so the
+    cost is O((n + m) * band) instead of O(n * m). If the best path runs along
+    the band edge, the band is doubled and the alignment recomputed.
+    Returns a list of beads ((i0, i1), (j0, j1), cost), covering src[i0:i1] and tgt[j0:j1].
+    """
+    n, m = len(src_lens), len(tgt_lens)
+    if n == 0 or m == 0:
+        return [((0, n), (0, m), 0.0)] if n or m else []
+
+    ratio = (sum(tgt_lens) / sum(src_lens)) if sum(src_lens) else 1.0
+    ratio = ratio or 1.0
+    band = band or DEFAULT_BAND
+    slope = m / n
+
+    src_prefix = [0]
+    for length in src_lens:
+        src_prefix.append(src_prefix[-1] + length)
+    tgt_prefix = [0]
+    for length in tgt_lens:
+        tgt_prefix.append(tgt_prefix[-1] + length)
+
+    # cost[(i, j)] = best cost of aligning src[:i] with tgt[:j]; back holds the bead used.
+    cost = {(0, 0): 0.0}
+    back = {}
+    for i in range(n + 1):
+        center = i * slope
+        for j in range(max(0, math.floor(center - band)), min(m, math.ceil(center + band)) + 1):
+            if (i, j) == (0, 0):
+                continue
+            best, best_bead = math.inf, None
+            for (di, dj), prior_cost in _BEADS:
+                pi, pj = i - di, j - dj
+                if pi < 0 or pj < 0:
+                    continue
+                prev = cost.get((pi, pj))
+                if prev is None:
+                    continue
+                c = prev + _bead_cost(
+                    src_prefix[i] - src_prefix[pi], tgt_prefix[j] - tgt_prefix[pj], ratio, prior_cost
+                )
+                if c < best:
+                    best, best_bead = c, (di, dj)
+            if best_bead is not None:
+                cost[(i, j)] = best
+                back[(i, j)] = best_bead
+
+    full_width = band >= max(n, m)
+    if (n, m) not in cost:
+        return align_lengths(src_lens, tgt_lens, band * 2)
+
+    beads = []
+    touches_edge = False
+    i, j = n, m
+    while (i, j) != (0, 0):
+        di, dj = back[(i, j)]
+        beads.append(((i - di, i), (j - dj, j), cost[(i, j)] - cost[(i - di, j - dj)]))
+        touches_edge = touches_edge or abs(j - i * slope) >= band - 2
+        i, j = i - di, j - dj
+    if touches_edge and not full_width:
+        return align_lengths(src_lens, tgt_lens, band * 2)
+    beads.reverse()
+    return beads
+
+
+def align_sentences(src_sentences: list[str], tgt_sentences: list[str], band: int | None = None):
+    """
+    Align two sentence lists of possibly different sizes.
+    Returns (source, target, score) triples; merged sentences are joined with a
+    space, and unmatched ones pair with "". `score` is exp(-cost) in (0, 1].
+    """
+    beads = align_lengths([len(s) for s in src_sentences], [len(t) for t in tgt_sentences], band)
+    return [
+        (
+            " ".join(src_sentences[i0:i1]),
+            " ".join(tgt_sentences[j0:j1]),
+            math.exp(-bead_cost),
+        )
+        for (i0, i1), (j0, j1), bead_cost in beads
+    ]
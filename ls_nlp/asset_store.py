@@ -0,0 +1,350 @@
+# asset_store.py
+# Persistent translation memory and glossary in SQLite.
+# Units and entries live in plain tables; FTS5 external-content indexes over
+# their search terms are kept in sync by triggers, so lookups run in SQLite
+# instead of loading the assets into every Streamlit process. WAL mode lets the
+# pooled read connections query while one (locked) writer appends.
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+from ls_nlp.glossary import Glossary
+from ls_nlp.tm_store import TMMatch, TMUnit, index_terms, normalize_lang, normalize_segment, rank_matches
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tm_units (
+    id INTEGER PRIMARY KEY,
+    key BLOB NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    src_lang TEXT NOT NULL,
+    tgt_lang TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    terms TEXT NOT NULL,
+    origin TEXT,
+    added REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tm_units_langs ON tm_units(src_lang, tgt_lang);
+CREATE VIRTUAL TABLE IF NOT EXISTS tm_fts USING fts5(
+    terms, content='tm_units', content_rowid='id', tokenize='unicode61 remove_diacritics 0'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS tm_vocab USING fts5vocab(tm_fts, 'row');
+CREATE TRIGGER IF NOT EXISTS tm_units_ai AFTER INSERT ON tm_units BEGIN
+    INSERT INTO tm_fts(rowid, terms) VALUES (new.id, new.terms);
+END;
+CREATE TRIGGER IF NOT EXISTS tm_units_ad AFTER DELETE ON tm_units BEGIN
+    INSERT INTO tm_fts(tm_fts, rowid, terms) VALUES ('delete', old.id, old.terms);
+END;
+
+CREATE TABLE IF NOT EXISTS glossary_entries (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    translations TEXT NOT NULL,
+    synonyms TEXT NOT NULL,
+    terms TEXT NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (lang, term)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS glossary_fts USING fts5(
+    terms, content='glossary_entries', content_rowid='id', tokenize='unicode61 remove_diacritics 0'
+);
+CREATE TRIGGER IF NOT EXISTS glossary_entries_ai AFTER INSERT ON glossary_entries BEGIN
+    INSERT INTO glossary_fts(rowid, terms) VALUES (new.id, new.terms);
+END;
+CREATE TRIGGER IF NOT EXISTS glossary_entries_ad AFTER DELETE ON glossary_entries BEGIN
+    INSERT INTO glossary_fts(glossary_fts, rowid, terms) VALUES ('delete', old.id, old.terms);
+END;
+CREATE TRIGGER IF NOT EXISTS glossary_entries_au AFTER UPDATE ON glossary_entries BEGIN
+    INSERT INTO glossary_fts(glossary_fts, rowid, terms) VALUES ('delete', old.id, old.terms);
+    INSERT INTO glossary_fts(rowid, terms) VALUES (new.id, new.terms);
+END;
+"""
+
+
+def sqlite_path(url: str) -> str:
+    """
+    File path of a sqlite:/// URL.
+    Example: sqlite_path("sqlite:///./local.db") -> "./local.db"
+             sqlite_path("sqlite:////var/data/assets.db") -> "/var/data/assets.db"
+    """
+    parsed = urlparse(url)
+    if parsed.scheme != "sqlite" or not parsed.path.strip("/"):
+        raise ValueError(f"Expected a sqlite:///path URL, got {url!r}")
+    return parsed.path[1:]
+
+
+def _match_query(terms, prefix: bool = False) -> str:
+    """FTS5 query matching any of `terms`, each quoted (optionally as a prefix)."""
+    star = "*" if prefix else ""
+    return " OR ".join('"' + term.replace('"', '""') + '"' + star for term in terms)
+
+
+def _unit_key(source: str, target: str, src_lang: str, tgt_lang: str) -> bytes:
+    payload = "\x00".join((src_lang, tgt_lang, normalize_segment(source), normalize_segment(target)))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
+
+class StoredEntry(NamedTuple):
+    id: int
+    term: str
+    lang: str
+    translations: dict
+
+
+class AssetStore:
+    """
+    SQLite-backed TM and glossary, shared by every session and process using
+    the same file.
+
+    Example:
+        store = AssetStore("./local.db")
+        store.add_tm_units([("Bonjour", "Hello", "fr", "en")], origin="alignment")
+        store.lookup("Bonjour !", k=3)                 # fuzzy matches (TMMatch)
+        store.search_tm("contrat")                     # full-text (TMUnit)
+        store.add_glossary(glossary)                   # persist a loaded termbase
+        store.search_glossary("machine")               # prefix search (StoredEntry)
+    """
+
+    def __init__(self, path: str, max_df: float = 0.05):
+        self.path = path
+        self.max_df = max_df
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._readers: queue.SimpleQueue = queue.SimpleQueue()
+
+    # ---- connections ----
+
+    def _connect_reader(self) -> sqlite3.Connection:
+        uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def _reader(self):
+        """Borrow a read-only connection from the pool (one is opened when none is free)."""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect_reader()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def _writer(self):
+        """The single write connection, in a transaction holding the database write lock."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    # ---- translation memory ----
+
+    def add_tm_units(self, units, origin: str | None = None, batch_size: int = 5000, on_progress=None) -> int:
+        """
+        Append (source, target, src_lang, tgt_lang) units in batches of `batch_size`,
+        one transaction each. Units already stored are skipped. Returns units added.
+        """
+        added = seen = 0
+        batch = []
+
+        def flush():
+            nonlocal added
+            with self._writer() as conn:
+                before = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tm_units").fetchone()[0]
+                conn.executemany(
+                    "INSERT OR IGNORE INTO tm_units (key, source, target, src_lang, tgt_lang, length, terms, origin, added)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+                # Ids are assigned in order while the write lock is held; ignored duplicates take none.
+                added += conn.execute("SELECT COALESCE(MAX(id), 0) FROM tm_units").fetchone()[0] - before
+            batch.clear()
+            if on_progress:
+                on_progress(seen, added)
+
+        now = time.time()
+        for source, target, src_lang, tgt_lang in units:
+            if not source.strip() or not target.strip():
+                continue
+            src_lang, tgt_lang = normalize_lang(src_lang), normalize_lang(tgt_lang)
+            batch.append((
+                _unit_key(source, target, src_lang, tgt_lang), source, target, src_lang, tgt_lang,
+                len(normalize_segment(source)), " ".join(index_terms(source)), origin, now,
+            ))
+            seen += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return added
+
+    def tm_count(self) -> int:
+        with self._reader() as conn:
+            return conn.execute("SELECT COUNT(*) FROM tm_units").fetchone()[0]
+
+    def tm_language_pairs(self) -> dict[tuple[str, str], int]:
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT src_lang, tgt_lang, COUNT(*) FROM tm_units GROUP BY src_lang, tgt_lang ORDER BY 3 DESC"
+            ).fetchall()
+        return {(src, tgt): n for src, tgt, n in rows}
+
+    def _rare_terms(self, conn, terms: set[str]) -> list[str]:
+        """Drop terms found in more than max_df of the units, unless nothing else is left."""
+        if not terms:
+            return []
+        marks = ",".join("?" * len(terms))
+        counts = dict(conn.execute(f"SELECT term, doc FROM tm_vocab WHERE term IN ({marks})", list(terms)))
+        present = [t for t in terms if t in counts]
+        total = conn.execute("SELECT COUNT(*) FROM tm_units").fetchone()[0]
+        limit = max(1, int(self.max_df * total))
+        return [t for t in present if counts[t] <= limit] or present
+
+    def _units(self, conn, sql: str, params) -> list[TMUnit]:
+        return [TMUnit(*row) for row in conn.execute(sql, params)]
+
+    def lookup(self, query: str, k: int = 5, min_score: int = 70, src_lang: str | None = None,
+               tgt_lang: str | None = None, max_candidates: int = 30) -> list[TMMatch]:
+        """
+        Fuzzy match like FuzzyTM.lookup: the FTS index (rare query terms, bm25
+        order) and the stored source length shortlist candidates, which are then
+        scored by edit distance.
+        """
+        query = normalize_segment(query)
+        if not query:
+            return []
+        length = len(query)
+        slack = 1 - min_score / 100
+        # |len(a) - len(b)| <= slack * max(len(a), len(b)) bounds the candidate length.
+        low, high = int(length * (1 - slack)), int(length / (1 - slack)) if slack < 1 else 1 << 31
+        sql = (
+            "SELECT u.id, u.source, u.target, u.src_lang, u.tgt_lang FROM tm_fts"
+            " JOIN tm_units u ON u.id = tm_fts.rowid"
+            " WHERE tm_fts MATCH ? AND u.length BETWEEN ? AND ?"
+        )
+        with self._reader() as conn:
+            terms = self._rare_terms(conn, index_terms(query))
+            if not terms:
+                return []
+            params = [_match_query(terms), low, high]
+            for column, lang in (("src_lang", src_lang), ("tgt_lang", tgt_lang)):
+                if lang:
+                    sql += f" AND u.{column} = ?"
+                    params.append(normalize_lang(lang))
+            candidates = self._units(conn, sql + " ORDER BY bm25(tm_fts) LIMIT ?", params + [max_candidates])
+        return rank_matches(query, candidates, k, min_score)
+
+    def search_tm(self, query: str, limit: int = 20) -> list[TMUnit]:
+        """Units whose source contains all words of `query` (concordance search), best first."""
+        terms = index_terms(query)
+        if not terms:
+            return []
+        match = " AND ".join(_match_query([term]) for term in sorted(terms))
+        with self._reader() as conn:
+            return self._units(
+                conn,
+                "SELECT u.id, u.source, u.target, u.src_lang, u.tgt_lang FROM tm_fts"
+                " JOIN tm_units u ON u.id = tm_fts.rowid WHERE tm_fts MATCH ? ORDER BY bm25(tm_fts) LIMIT ?",
+                (match, limit),
+            )
+
+    # ---- glossary ----
+
+    def add_glossary(self, glossary: Glossary, batch_size: int = 5000) -> int:
+        """
+        Save every entry of an in-memory Glossary (synonyms included). An entry with
+        the same term and language replaces the stored one. Returns entries written.
+        """
+        forms: dict[int, dict[str, list[str]]] = {}
+        for entry_id, lang, text in glossary.iter_forms():
+            forms.setdefault(entry_id, {}).setdefault(lang, []).append(text)
+        rows, now = [], time.time()
+        for entry_id, entry in enumerate(glossary.entries):
+            primary = {entry.lang: entry.term, **entry.translations}
+            synonyms = {
+                lang: [t for t in texts if t != primary.get(lang)]
+                for lang, texts in forms.get(entry_id, {}).items()
+            }
+            synonyms = {lang: texts for lang, texts in synonyms.items() if texts}
+            terms = set()
+            for text in [*primary.values(), *(t for texts in synonyms.values() for t in texts)]:
+                terms |= index_terms(text)
+            rows.append((
+                entry.term, entry.lang, json.dumps(entry.translations, ensure_ascii=False),
+                json.dumps(synonyms, ensure_ascii=False), " ".join(terms), now,
+            ))
+        for start in range(0, len(rows), batch_size):
+            with self._writer() as conn:
+                conn.executemany(
+                    "INSERT INTO glossary_entries (term, lang, translations, synonyms, terms, updated)"
+                    " VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (lang, term) DO UPDATE SET translations = excluded.translations,"
+                    " synonyms = excluded.synonyms, terms = excluded.terms, updated = excluded.updated",
+                    rows[start:start + batch_size],
+                )
+        return len(rows)
+
+    def glossary_count(self) -> int:
+        with self._reader() as conn:
+            return conn.execute("SELECT COUNT(*) FROM glossary_entries").fetchone()[0]
+
+    def glossary_revision(self) -> tuple[int, float]:
+        """Changes whenever entries are added or updated; a cache key for load_glossary()."""
+        with self._reader() as conn:
+            count, updated = conn.execute("SELECT COUNT(*), MAX(updated) FROM glossary_entries").fetchone()
+        return count, updated or 0.0
+
+    def load_glossary(self, source_lang: str = "en") -> Glossary:
+        """In-memory Glossary index over the stored entries (for typo-tolerant search)."""
+        glossary = Glossary(source_lang)
+        with self._reader() as conn:
+            for term, lang, translations, synonyms in conn.execute(
+                "SELECT term, lang, translations, synonyms FROM glossary_entries ORDER BY id"
+            ):
+                glossary.add(term, json.loads(translations), lang=lang, synonyms=json.loads(synonyms))
+        return glossary
+
+    def search_glossary(self, query: str, limit: int = 20) -> list[StoredEntry]:
+        """Entries with a term, translation or synonym starting with every word of `query`."""
+        terms = index_terms(query)
+        if not terms:
+            return []
+        match = " AND ".join(_match_query([term], prefix=True) for term in sorted(terms))
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT g.id, g.term, g.lang, g.translations FROM glossary_fts"
+                " JOIN glossary_entries g ON g.id = glossary_fts.rowid"
+                " WHERE glossary_fts MATCH ? ORDER BY bm25(glossary_fts) LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        return [StoredEntry(id_, term, lang, json.loads(translations)) for id_, term, lang, translations in rows]
+
+    def close(self):
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        self._conn.close()
@@ -0,0 +1,81 @@
+# batching.py
+# Process-wide micro-batching for model inference.
+import threading
+import time
+from concurrent.futures import Future
+from queue import Queue, Empty
+
+
+class MicroBatcher:
+    """
+    Collect concurrent single-item requests for a few milliseconds and run
+    them through `predict_batch` as one batch.
+    Each caller gets back the result for its own item, in order.
+
+    Parameters:
+    - predict_batch: callable taking a list of items, returning a list of results
+    - max_batch_size: upper bound on items per batch
+    - max_wait_ms: how long the first queued item waits for companions
+    """
+
+    def __init__(self, predict_batch, max_batch_size: int = 32, max_wait_ms: float = 10):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._thread = threading.Thread(target=self._run, name="ls-micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout: float | None = None):
+        """Blocking helper: submit one item and wait for its result."""
+        return self.submit(item).result(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            }
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        batch = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = list(self.predict_batch([item for item, _ in batch]))
+            if len(results) != len(batch):
+                # zip() would leave the extra futures unresolved and their callers waiting forever
+                raise ValueError(f"predict_batch returned {len(results)} results for {len(batch)} items")
+        except Exception as exc:
+            for _, fut in batch:
+                fut.set_exception(exc)
+            return
+
+        with self._lock:
+            self._batches += 1
+            self._items += len(batch)
+        for (_, fut), result in zip(batch, results):
+            fut.set_result(result)
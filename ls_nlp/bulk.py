@@ -0,0 +1,176 @@
+# bulk.py
+# Streaming readers and writers for file-based (bulk) processing.
+# Records are read and written chunk by chunk so the whole file is never materialized.
+import csv
+import io
+import json
+import os
+import tempfile
+
+
+def upload_format(name: str) -> str:
+    """
+    Infer 'csv', 'jsonl' or 'txt' (one record per line) from a file name.
+    'jsonl' also covers .json uploads: iter_records detects a top-level array.
+    """
+    name = name.lower()
+    if name.endswith((".jsonl", ".json", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".txt"):
+        return "txt"
+    return "csv"
+
+
+def _text_stream(binary):
+    binary.seek(0)
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+def csv_columns(binary) -> list[str]:
+    """Read only the header row of a CSV upload."""
+    stream = _text_stream(binary)
+    try:
+        return next(csv.reader(stream), [])
+    finally:
+        stream.detach()
+        binary.seek(0)
+
+
+def iter_records(binary, fmt: str):
+    """
+    Yield one dict per CSV row, JSONL line, JSON array element or non-empty
+    TXT line ({"text": line}); non-object JSON values become {"text": value}.
+    """
+    json_array = fmt == "jsonl" and is_json_array(binary)
+    stream = _text_stream(binary)
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(stream)
+        elif fmt == "txt":
+            for line in stream:
+                line = line.strip()
+                if line:
+                    yield {"text": line}
+        elif json_array:
+            for record in iter_json_array(stream):
+                yield record if isinstance(record, dict) else {"text": record}
+        else:
+            for line in stream:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                yield record if isinstance(record, dict) else {"text": record}
+    finally:
+        stream.detach()
+
+
+def iter_json_array(stream, read_size: int = 1 << 16):
+    """
+    Yield the elements of a top-level JSON array read from a text stream,
+    decoding each element as soon as it is complete (bounded memory).
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof, opened = "", 0, False, False
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer):
+            if not opened:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                opened, pos = True, pos + 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                end = None
+            # A value ending exactly at the buffer end may be a truncated number: read on first.
+            if end is not None and (end < len(buffer) or eof):
+                yield item
+                pos = end
+                continue
+            if eof:
+                raise ValueError(f"Malformed JSON array element near {buffer[pos:pos + 40]!r}")
+        elif eof:
+            raise ValueError("Unterminated JSON array")
+        chunk = stream.read(read_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+def is_json_array(binary) -> bool:
+    """Whether an upload holds a top-level JSON array rather than JSON Lines."""
+    binary.seek(0)
+    head = binary.read(4096).decode("utf-8-sig", errors="ignore").lstrip()
+    binary.seek(0)
+    return head.startswith("[")
+
+
+def iter_chunks(items, size: int):
+    """Group any iterable into lists of at most `size` items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_record_chunks(binary, fmt: str, chunk_size: int = 256):
+    yield from iter_chunks(iter_records(binary, fmt), chunk_size)
+
+
+def read_progress(binary, total: int) -> float:
+    """Fraction of the upload consumed so far (based on the underlying byte offset)."""
+    if not total:
+        return 1.0
+    return min(binary.tell() / total, 1.0)
+
+
+def new_output_path(suffix: str) -> str:
+    """Reserve a temp file for a streamed export."""
+    fd, path = tempfile.mkstemp(prefix="ls_", suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def discard_output(path: str | None):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+class JsonlRecordWriter:
+    """One JSON object per line; same interface as CsvRecordWriter."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write_rows(self, records):
+        for record in records:
+            self.stream.write(json.dumps(record, ensure_ascii=False))
+            self.stream.write("\n")
+
+
+class CsvRecordWriter:
+    """
+    CSV writer whose columns are fixed by the first record written.
+    Extra keys in later records are ignored, missing ones left empty.
+    """
+
+    def __init__(self, stream, extra_fields=()):
+        self.stream = stream
+        self.extra_fields = list(extra_fields)
+        self._writer = None
+
+    def write_rows(self, records):
+        for record in records:
+            if self._writer is None:
+                fields = [f for f in record if f not in self.extra_fields] + self.extra_fields
+                self._writer = csv.DictWriter(self.stream, fieldnames=fields, extrasaction="ignore")
+                self._writer.writeheader()
+            self._writer.writerow(record)
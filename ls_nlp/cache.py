@@ -0,0 +1,138 @@
+# cache.py
+# Persistent, content-addressed cache for model outputs (SQLite, LRU-bounded).
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+_WS = re.compile(r"\s+")
+# Eviction trims to this fraction of max_entries, so it runs once per batch of inserts.
+EVICT_TO = 0.9
+
+
+def normalize_for_cache(text: str) -> str:
+    """Unicode NFC + collapsed whitespace, so trivially different pastes share an entry."""
+    return _WS.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(model: str, text: str) -> str:
+    payload = f"{model}\x00{normalize_for_cache(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class InferenceCache:
+    """
+    Disk-backed cache keyed by sha256(model + normalized text).
+    Shared by every session (and process) pointing at the same file, survives
+    restarts, and evicts least-recently-used entries beyond `max_entries`
+    (down to EVICT_TO of it).
+    Values must be JSON-serializable.
+    """
+
+    def __init__(self, path: str, max_entries: int = 50_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS inference_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                value TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_inference_cache_last_used ON inference_cache(last_used)"
+        )
+        self._conn.commit()
+        self._entries = self._count()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM inference_cache").fetchone()[0]
+
+    def get(self, model: str, text: str):
+        key = cache_key(model, text)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM inference_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE inference_cache SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, model: str, text: str, value):
+        key = cache_key(model, text)
+        with self._lock:
+            row = (key, model, json.dumps(value, ensure_ascii=False), time.time())
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO inference_cache (key, model, value, last_used) VALUES (?, ?, ?, ?)",
+                row,
+            ).rowcount
+            if not inserted:
+                self._conn.execute(
+                    "UPDATE inference_cache SET model = ?, value = ?, last_used = ? WHERE key = ?",
+                    row[1:] + row[:1],
+                )
+            self._entries += inserted
+            if self._entries > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def get_or_compute(self, model: str, text: str, compute):
+        """Return the cached value, or run `compute(text)` and store its result."""
+        value = self.get(model, text)
+        if value is None:
+            value = compute(text)
+            self.put(model, text, value)
+        return value
+
+    def _evict(self):
+        # Other processes may write to the same file; recount before trimming.
+        self._entries = self._count()
+        excess = self._entries - int(self.max_entries * EVICT_TO)
+        if excess > 0:
+            self._conn.execute(
+                """
+                DELETE FROM inference_cache WHERE key IN (
+                    SELECT key FROM inference_cache ORDER BY last_used LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+            self._entries -= excess
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": self._count(),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM inference_cache")
+            self._conn.commit()
+            self._entries = 0
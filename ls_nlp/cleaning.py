@@ -0,0 +1,146 @@
+# cleaning.py
+# Text cleaning steps composed into a single pipeline applied once per document,
+# with batch execution over uploaded files in the shared worker pool.
+import io
+import string
+from functools import partial
+
+from ls_nlp.bulk import JsonlRecordWriter, iter_chunks, iter_records, read_progress
+from ls_nlp.markup import iter_strip_tags, strip_tags
+from ls_nlp.workers import imap_bounded
+
+_PUNCT_TABLE = str.maketrans("", "", string.punctuation)
+MARKUP_EXTENSIONS = (".html", ".htm", ".xhtml", ".xml")
+
+
+def clean_tags(text: str) -> str:
+    """Remove HTML/XML tags, unescape entities and drop script/style bodies."""
+    return strip_tags(text)
+
+
+def to_lower(text: str) -> str:
+    return text.lower()
+
+
+def strip_punct(text: str) -> str:
+    return text.translate(_PUNCT_TABLE)
+
+
+# Step id -> (display name, function), in the order they are applied.
+STEPS = {
+    "tags": ("Remove tags", clean_tags),
+    "lower": ("Lowercase", to_lower),
+    "punct": ("Strip punctuation", strip_punct),
+}
+
+
+class CleaningPipeline:
+    """
+    The selected cleaning steps, resolved once and applied in a single call per
+    document. Instances are picklable, so batches can run in the worker pool.
+
+    Example:
+        pipeline = CleaningPipeline(["tags", "lower"])
+        pipeline("<b>Hello</b>")          # "hello"
+        pipeline.trace("<b>Hello</b>")    # [("Remove tags", "<b>Hello</b>", "Hello"), ...]
+    """
+
+    def __init__(self, steps):
+        unknown = set(steps) - set(STEPS)
+        if unknown:
+            raise ValueError(f"Unknown cleaning steps {sorted(unknown)}; expected some of {list(STEPS)}")
+        self.steps = tuple(step for step in STEPS if step in steps)
+        self._funcs = tuple(STEPS[step][1] for step in self.steps)
+
+    def __bool__(self):
+        return bool(self.steps)
+
+    def __call__(self, text: str) -> str:
+        for func in self._funcs:
+            text = func(text)
+        return text
+
+    def clean_records(self, records: list[dict], text_field: str = "text") -> list[dict]:
+        """Batch worker: clean `text_field` of each record in place."""
+        for record in records:
+            record[text_field] = self(str(record.get(text_field) or ""))
+        return records
+
+    def without(self, step: str) -> "CleaningPipeline":
+        return CleaningPipeline([s for s in self.steps if s != step])
+
+    def trace(self, text: str) -> list[tuple[str, str, str]]:
+        """(step name, before, after) per step; only meant for previews."""
+        steps = []
+        for step, func in zip(self.steps, self._funcs):
+            cleaned = func(text)
+            steps.append((STEPS[step][0], text, cleaned))
+            text = cleaned
+        return steps
+
+
+def clean_file(
+    binary,
+    fmt: str,
+    out,
+    pipeline: CleaningPipeline,
+    text_field: str = "text",
+    chunk_size: int = 1000,
+    parallel: bool = True,
+    preview_docs: int = 3,
+    on_chunk=None,
+):
+    """
+    Clean a TXT (one document per line) or JSONL upload into the text stream `out`,
+    in the same format. Chunks of records run through the worker pool, in order.
+    Only the first `preview_docs` documents keep a step-by-step trace.
+    Returns (document count, [trace, ...]).
+    """
+    previews = []
+
+    def chunks():
+        for chunk in iter_chunks(iter_records(binary, fmt), chunk_size):
+            for record in chunk[:preview_docs - len(previews)]:
+                previews.append(pipeline.trace(str(record.get(text_field) or "")))
+            yield chunk
+
+    writer = JsonlRecordWriter(out) if fmt == "jsonl" else None
+    docs = 0
+    for records in imap_bounded(partial(pipeline.clean_records, text_field=text_field), chunks(), parallel=parallel):
+        if writer:
+            writer.write_rows(records)
+        else:
+            out.writelines(" ".join(r[text_field].splitlines()) + "\n" for r in records)
+        docs += len(records)
+        if on_chunk:
+            on_chunk(docs, read_progress(binary, getattr(binary, "size", 0)))
+    return docs, previews
+
+
+def clean_markup_file(binary, out, pipeline: CleaningPipeline, read_size: int = 1 << 16, preview_chars: int = 2000, on_chunk=None):
+    """
+    Clean one large HTML/XML document (the whole file) into the text stream `out`.
+    The markup is fed to the tag stripper in `read_size` chunks, so pages of any
+    size use bounded memory; the remaining steps run on each extracted piece.
+    Returns (1, [trace of the first `preview_chars` characters]).
+    """
+    binary.seek(0)
+    stream = io.TextIOWrapper(binary, encoding="utf-8-sig", errors="replace")
+    rest = pipeline.without("tags")
+    previews = []
+
+    def chunks():
+        for chunk in iter(lambda: stream.read(read_size), ""):
+            if not previews:
+                previews.append(pipeline.trace(chunk[:preview_chars]))
+            yield chunk
+            if on_chunk:
+                on_chunk(1, read_progress(binary, getattr(binary, "size", 0)))
+
+    try:
+        pieces = iter_strip_tags(chunks()) if "tags" in pipeline.steps else chunks()
+        for piece in pieces:
+            out.write(rest(piece))
+    finally:
+        stream.detach()
+    return 1, previews
@@ -0,0 +1,243 @@
+# dedup.py
+# Exact and near-duplicate detection for text segments.
+# Near duplicates are found with MinHash signatures and LSH banding, so exact
+# Jaccard similarity is only computed for segments sharing at least one band.
+import hashlib
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from ls_nlp.simhash import SimHashIndex, fingerprints, hamming_threshold, similarity_from_hamming
+
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACE = re.compile(r"\s+")
+
+METHODS = ("minhash", "simhash", "exhaustive")
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, collapse whitespace and drop punctuation."""
+    return _PUNCT.sub("", _SPACE.sub(" ", text.lower())).strip()
+
+
+def token_overlap(a: str, b: str) -> float:
+    """Jaccard similarity of the word sets of two normalized strings."""
+    return jaccard(frozenset(a.split()), frozenset(b.split()))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def exact_key(norm: str) -> bytes:
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=16).digest()
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+@lru_cache(maxsize=32)
+def lsh_params(threshold: float, num_perm: int, fn_weight: float = 0.9) -> tuple[int, int]:
+    """
+    Choose (bands, rows) with bands * rows <= num_perm minimizing the weighted
+    false-positive and false-negative areas of the LSH S-curve around `threshold`.
+    Missed duplicates cost more than false candidates (which are only an extra
+    exact Jaccard check), hence the default weight on false negatives.
+    """
+    xs = np.linspace(0.0, 1.0, 201)
+    best, best_error = (1, num_perm), np.inf
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        if rows == 0:
+            break
+        prob = 1 - (1 - xs ** rows) ** bands
+        false_pos = np.trapezoid(np.where(xs < threshold, prob, 0), xs)
+        false_neg = np.trapezoid(np.where(xs >= threshold, 1 - prob, 0), xs)
+        error = (1 - fn_weight) * false_pos + fn_weight * false_neg
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHashLSH:
+    """
+    MinHash signatures with banded LSH buckets.
+
+    Example:
+        lsh = MinHashLSH(threshold=0.8)
+        sigs = lsh.signatures([{"hello", "world"}, {"hello", "there"}])
+        lsh.insert(0, sigs[0])
+        lsh.candidates(sigs[1])   # ids sharing at least one band with sigs[1]
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, seed: int = 1):
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        # a, b < 2**32 and 32-bit token hashes keep a * h + b inside uint64.
+        self._a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(0, 1 << 63, self.rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._band_salt = rng.integers(0, 1 << 63, self.bands, dtype=np.uint64)
+        self._buckets = [{} for _ in range(self.bands)]
+
+    def signatures(self, token_sets) -> np.ndarray:
+        """One row of `num_perm` min-hashes per (non-empty) token set, computed in one pass."""
+        lengths = np.fromiter((len(t) for t in token_sets), dtype=np.int64, count=len(token_sets))
+        hashes = np.fromiter(
+            (_token_hash(tok) for tokens in token_sets for tok in tokens),
+            dtype=np.uint64,
+            count=int(lengths.sum()),
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME & MAX_HASH
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        return np.minimum.reduceat(permuted, starts, axis=0)
+
+    def band_keys(self, signature: np.ndarray):
+        """One bytes key per band (the band's slice of the signature)."""
+        rows = self.rows
+        for band in range(self.bands):
+            yield signature[band * rows:(band + 1) * rows].tobytes()
+
+    def band_hashes(self, signatures: np.ndarray) -> np.ndarray:
+        """(n, bands) int64 digests of each band, as compact bucket keys for on-disk indexes."""
+        n = len(signatures)
+        bands = signatures[:, :self.bands * self.rows].reshape(n, self.bands, self.rows)
+        mixed = (bands * self._band_mix).sum(axis=2, dtype=np.uint64) + self._band_salt
+        return mixed.view(np.int64)
+
+    def candidates(self, signature: np.ndarray) -> set[int]:
+        found = set()
+        for bucket, key in zip(self._buckets, self.band_keys(signature)):
+            found.update(bucket.get(key, ()))
+        return found
+
+    def insert(self, item_id: int, signature: np.ndarray):
+        for bucket, key in zip(self._buckets, self.band_keys(signature)):
+            bucket.setdefault(key, []).append(item_id)
+
+
+def _dedup_exhaustive(segments, norms, threshold):
+    kept, kept_tokens, removed = [], [], []
+    exact = {}
+    for seg, norm in zip(segments, norms):
+        match = exact.get(norm)
+        if match is not None:
+            removed.append((seg, kept[match], 1.0))
+            continue
+        tokens = frozenset(norm.split())
+        for i, other in enumerate(kept_tokens):
+            sim = jaccard(tokens, other)
+            if sim >= threshold:
+                removed.append((seg, kept[i], sim))
+                break
+        else:
+            exact[norm] = len(kept)
+            kept.append(seg)
+            kept_tokens.append(tokens)
+    return kept, removed
+
+
+def _dedup_minhash(segments, norms, threshold, num_perm, chunk_size):
+    lsh = MinHashLSH(threshold, num_perm)
+    kept, kept_tokens, removed = [], [], []
+    exact = {}
+    for start in range(0, len(segments), chunk_size):
+        chunk = range(start, min(start + chunk_size, len(segments)))
+        tokens = [frozenset(norms[i].split()) for i in chunk]
+        non_empty = [k for k, t in enumerate(tokens) if t]
+        sigs = lsh.signatures([tokens[k] for k in non_empty]) if non_empty else None
+        sig_row = {k: row for row, k in enumerate(non_empty)}
+
+        for k, i in enumerate(chunk):
+            seg, key = segments[i], exact_key(norms[i])
+            match = exact.get(key)
+            if match is not None:
+                removed.append((seg, kept[match], 1.0))
+                continue
+            signature = sigs[sig_row[k]] if k in sig_row else None
+            duplicate = None
+            if signature is not None:
+                # Earliest kept segment wins, as in the exhaustive scan.
+                for cand in sorted(lsh.candidates(signature)):
+                    sim = jaccard(tokens[k], kept_tokens[cand])
+                    if sim >= threshold:
+                        duplicate = (seg, kept[cand], sim)
+                        break
+            if duplicate:
+                removed.append(duplicate)
+                continue
+            exact[key] = len(kept)
+            if signature is not None:
+                lsh.insert(len(kept), signature)
+            kept.append(seg)
+            kept_tokens.append(tokens[k])
+    return kept, removed
+
+
+def _dedup_simhash(segments, norms, threshold, chunk_size):
+    # Decisions use fingerprint distance only: no token sets are kept.
+    index = SimHashIndex(hamming_threshold(threshold))
+    kept, kept_ids, removed = [], {}, []
+    exact = {}
+    for start in range(0, len(segments), chunk_size):
+        chunk = range(start, min(start + chunk_size, len(segments)))
+        tokens = [frozenset(norms[i].split()) for i in chunk]
+        non_empty = [k for k, t in enumerate(tokens) if t]
+        fps = fingerprints([tokens[k] for k in non_empty]).tolist() if non_empty else []
+        fp_of = dict(zip(non_empty, fps))
+
+        for k, i in enumerate(chunk):
+            seg, key = segments[i], exact_key(norms[i])
+            match = exact.get(key)
+            if match is not None:
+                removed.append((seg, kept[match], 1.0))
+                continue
+            fp = fp_of.get(k)
+            found = index.query(fp) if fp is not None else None
+            if found:
+                fp_id, distance = found
+                removed.append((seg, kept[kept_ids[fp_id]], similarity_from_hamming(distance)))
+                continue
+            exact[key] = len(kept)
+            if fp is not None:
+                kept_ids[index.add(fp)] = len(kept)
+            kept.append(seg)
+    return kept, removed
+
+
+def deduplicate_segments(
+    segments,
+    similarity_threshold: float = 0.8,
+    method: str = "minhash",
+    num_perm: int = 128,
+    chunk_size: int = 4096,
+):
+    """
+    Drop exact and near-duplicate segments (word-set Jaccard >= threshold).
+    Each segment is normalized once; exact duplicates are caught by hash.
+
+    Parameters:
+    - method: "minhash" (LSH candidates, approximate recall), "simhash" (64-bit
+      fingerprints within hamming_threshold(similarity_threshold) bits; reported
+      similarity is estimated from the distance; thresholds that map beyond
+      simhash.MAX_DISTANCE raise ValueError, see simhash.supports) or "exhaustive" (compare
+      against every kept segment; exact but O(n²))
+
+    Returns (kept, removed) where removed holds (segment, matched_kept_segment, similarity).
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown dedup method {method!r}; expected one of {METHODS}")
+    segments = list(segments)
+    norms = [normalize_text(s) for s in segments]
+    if method == "exhaustive":
+        return _dedup_exhaustive(segments, norms, similarity_threshold)
+    if method == "simhash":
+        return _dedup_simhash(segments, norms, similarity_threshold, chunk_size)
+    return _dedup_minhash(segments, norms, similarity_threshold, num_perm, chunk_size)
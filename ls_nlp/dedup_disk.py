@@ -0,0 +1,186 @@
+# dedup_disk.py
+# Out-of-core deduplication for line-based corpora larger than RAM.
+# Lines are streamed in chunks; exact hashes, LSH band buckets and kept
+# segments live in a scratch SQLite file, and results are written to files.
+import csv
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from ls_nlp.bulk import iter_chunks, read_progress
+from ls_nlp.dedup import MinHashLSH, exact_key, jaccard, normalize_text
+
+_SCHEMA = """
+CREATE TABLE kept (id INTEGER PRIMARY KEY, text TEXT NOT NULL, norm TEXT NOT NULL);
+CREATE TABLE exact (key BLOB PRIMARY KEY, kept_id INTEGER NOT NULL) WITHOUT ROWID;
+CREATE TABLE bands (key INTEGER NOT NULL, kept_id INTEGER NOT NULL, PRIMARY KEY (key, kept_id)) WITHOUT ROWID;
+"""
+_MAX_PARAMS = 500
+
+
+def _open_scratch(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    # Scratch data is rebuilt from the input on failure: no journal, no fsync.
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _lookup(conn, sql: str, keys) -> list[tuple]:
+    """Run `sql` (with one `{}` IN-list placeholder) over `keys` in parameter-sized slices."""
+    keys = list(keys)
+    rows = []
+    for start in range(0, len(keys), _MAX_PARAMS):
+        part = keys[start:start + _MAX_PARAMS]
+        rows.extend(conn.execute(sql.format(",".join("?" * len(part))), part))
+    return rows
+
+
+def _numbered_lines(binary):
+    """(1-based line number in the file, stripped text) for every non-empty line."""
+    binary.seek(0)
+    stream = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    try:
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if line:
+                yield number, line
+    finally:
+        stream.detach()
+
+
+def new_output_dir(base_dir: str) -> str:
+    os.makedirs(base_dir, exist_ok=True)
+    return tempfile.mkdtemp(prefix="dedup_", dir=base_dir)
+
+
+def discard_output_dir(summary: dict | None):
+    """Delete the output directory of a previous run (kept.txt, removed.tsv, ...)."""
+    if summary:
+        shutil.rmtree(os.path.dirname(summary["outputs"]["kept"]), ignore_errors=True)
+
+
+def deduplicate_file(
+    binary,
+    out_dir: str,
+    similarity_threshold: float = 0.8,
+    total: int | None = None,
+    num_perm: int = 128,
+    chunk_size: int = 4096,
+    on_chunk=None,
+) -> dict:
+    """
+    Deduplicate a one-segment-per-line file without holding it in memory.
+
+    Writes to `out_dir`:
+    - kept.txt: kept segments (stripped of surrounding whitespace), in input order
+    - removed.tsv: line, similarity, removed segment, matched kept segment; `line`
+      is the 1-based line number in the input file, blank lines included
+    - summary.json: counts, timing and output paths (also returned)
+
+    `on_chunk(segments, kept, removed, fraction)` is called after every chunk;
+    segments are the non-empty lines read so far.
+    """
+    started = time.monotonic()
+    lsh = MinHashLSH(similarity_threshold, num_perm)
+    paths = {name: os.path.join(out_dir, name) for name in ("kept.txt", "removed.tsv", "summary.json")}
+    db_path = os.path.join(out_dir, "scratch.sqlite")
+    conn = _open_scratch(db_path)
+    counts = {"segments": 0, "kept": 0, "removed": 0, "exact": 0, "near": 0}
+
+    try:
+        with open(paths["kept.txt"], "w", encoding="utf-8") as kept_out, \
+                open(paths["removed.tsv"], "w", encoding="utf-8", newline="") as removed_out:
+            removed_writer = csv.writer(removed_out, delimiter="\t")
+            removed_writer.writerow(["line", "similarity", "segment", "matched"])
+
+            for numbered in iter_chunks(_numbered_lines(binary), chunk_size):
+                line_numbers = [number for number, _ in numbered]
+                chunk = [text for _, text in numbered]
+                norms = [normalize_text(t) for t in chunk]
+                tokens = [frozenset(n.split()) for n in norms]
+                keys = [exact_key(n) for n in norms]
+                non_empty = [k for k, t in enumerate(tokens) if t]
+                band_keys = [[] for _ in chunk]
+                if non_empty:
+                    hashes = lsh.band_hashes(lsh.signatures([tokens[k] for k in non_empty]))
+                    for k, row in zip(non_empty, hashes.tolist()):
+                        band_keys[k] = row
+
+                # Everything the chunk can match in earlier chunks, fetched in a few queries.
+                exact = dict(_lookup(conn, "SELECT key, kept_id FROM exact WHERE key IN ({})", set(keys)))
+                buckets = {}
+                for key, kept_id in _lookup(
+                    conn, "SELECT key, kept_id FROM bands WHERE key IN ({})",
+                    {key for item in band_keys for key in item},
+                ):
+                    buckets.setdefault(key, []).append(kept_id)
+                kept_rows = {
+                    kept_id: (text, frozenset(norm.split()))
+                    for kept_id, text, norm in _lookup(
+                        conn, "SELECT id, text, norm FROM kept WHERE id IN ({})",
+                        set(exact.values()).union(*buckets.values()),
+                    )
+                }
+
+                new_kept, new_bands = [], []
+                for k, text in enumerate(chunk):
+                    counts["segments"] += 1
+                    match = exact.get(keys[k])
+                    if match is not None:
+                        removed_writer.writerow([line_numbers[k], "1.00", text, kept_rows[match][0]])
+                        counts["removed"] += 1
+                        counts["exact"] += 1
+                        continue
+
+                    duplicate = None
+                    candidates = {i for key in band_keys[k] for i in buckets.get(key, ())}
+                    for cand in sorted(candidates):
+                        sim = jaccard(tokens[k], kept_rows[cand][1])
+                        if sim >= similarity_threshold:
+                            duplicate = (cand, sim)
+                            break
+                    if duplicate:
+                        cand, sim = duplicate
+                        removed_writer.writerow([line_numbers[k], f"{sim:.2f}", text, kept_rows[cand][0]])
+                        counts["removed"] += 1
+                        counts["near"] += 1
+                        continue
+
+                    kept_id = counts["kept"]
+                    counts["kept"] += 1
+                    kept_out.write(text + "\n")
+                    exact[keys[k]] = kept_id
+                    kept_rows[kept_id] = (text, tokens[k])
+                    for key in band_keys[k]:
+                        buckets.setdefault(key, []).append(kept_id)
+                        new_bands.append((key, kept_id))
+                    new_kept.append((kept_id, text, norms[k], keys[k]))
+
+                conn.executemany("INSERT INTO kept VALUES (?, ?, ?)", [r[:3] for r in new_kept])
+                conn.executemany("INSERT INTO exact VALUES (?, ?)", [(r[3], r[0]) for r in new_kept])
+                conn.executemany("INSERT INTO bands VALUES (?, ?)", new_bands)
+                conn.commit()
+                if on_chunk:
+                    on_chunk(counts["segments"], counts["kept"], counts["removed"], read_progress(binary, total))
+    finally:
+        conn.close()
+        os.remove(db_path)
+
+    summary = {
+        **counts,
+        "threshold": similarity_threshold,
+        "bands": lsh.bands,
+        "rows": lsh.rows,
+        "seconds": round(time.monotonic() - started, 2),
+        "outputs": {"kept": paths["kept.txt"], "removed": paths["removed.tsv"]},
+    }
+    with open(paths["summary.json"], "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
@@ -0,0 +1,67 @@
+# distance.py
+# Edit distance helpers shared by glossary and translation memory lookups.
+from collections import Counter
+
+
+def levenshtein(a: str, b: str, max_distance: int | None = None) -> int:
+    """
+    Character edit distance (insert / delete / substitute).
+    With `max_distance`, only a diagonal band of width 2 * max_distance + 1 is
+    computed and max_distance + 1 is returned as soon as the distance is known
+    to exceed it, so rejected candidates cost O(len * max_distance).
+    """
+    if a == b:
+        return 0
+    if len(a) > len(b):
+        a, b = b, a
+    n, m = len(a), len(b)
+    k = m if max_distance is None else max_distance
+    over = k + 1
+    if m - n > k:
+        return over
+    if n == 0:
+        return m
+
+    previous = [j if j <= k else over for j in range(m + 1)]
+    for i in range(1, n + 1):
+        current = [over] * (m + 1)
+        current[0] = i if i <= k else over
+        row_min = current[0]
+        char = a[i - 1]
+        for j in range(max(1, i - k), min(m, i + k) + 1):
+            cost = previous[j - 1] + (char != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost if cost < over else over
+            if cost < row_min:
+                row_min = cost
+        if row_min > k:
+            return over
+        previous = current
+    return min(previous[m], over)
+
+
+def char_bag_bound(a_counts: Counter, b: str) -> int:
+    """
+    Cheap lower bound on levenshtein(a, b) from character counts (`a_counts`
+    is Counter(a)): every surplus character on either side needs an edit.
+    """
+    b_counts = Counter(b)
+    return max(sum((a_counts - b_counts).values()), sum((b_counts - a_counts).values()))
+
+
+def similarity(a: str, b: str, distance: int | None = None) -> float:
+    """1 - distance / longer length, in [0, 1]."""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    if distance is None:
+        distance = levenshtein(a, b)
+    return max(0.0, 1 - distance / longest)
+
+
+def max_distance_for(similarity_floor: float, length: int) -> int:
+    """Largest edit distance that keeps similarity >= floor for strings up to `length`."""
+    return int((1 - similarity_floor) * length)
@@ -0,0 +1,290 @@
+# glossary.py
+# Termbase with a character trie (prefix lookup) and a trigram index (fuzzy
+# lookup) over the terms of every language, so EN→FR/ZH and reverse FR/ZH→EN
+# search both run without scanning the termbase.
+import csv
+import io
+import re
+import unicodedata
+from array import array
+from typing import NamedTuple
+
+import numpy as np
+
+from ls_nlp.distance import levenshtein, max_distance_for, similarity
+from ls_nlp.parallel_io import XML_LANG, iter_elements, local_name
+from ls_nlp.tm_store import normalize_lang
+
+_LANG_COLUMN = re.compile(r"^([a-z]{2})(?:-[a-z0-9]{2,8})*$")
+_ISO_639_1 = frozenset("""
+    aa ab ae af ak am an ar as av ay az ba be bg bh bi bm bn bo br bs ca ce ch co cr cs cu cv cy
+    da de dv dz ee el en eo es et eu fa ff fi fj fo fr fy ga gd gl gn gu gv ha he hi ho hr ht hu
+    hy hz ia id ie ig ii ik io is it iu ja jv ka kg ki kj kk kl km kn ko kr ks ku kv kw ky la lb
+    lg li ln lo lt lu lv mg mh mi mk ml mn mr ms mt my na nb nd ne ng nl nn no nr nv ny oc oj om
+    or os pa pi pl ps pt qu rm rn ro ru rw sa sc sd se sg si sk sl sm sn so sq sr ss st su sv sw
+    ta te tg th ti tk tl tn to tr ts tt tw ty ug uk ur uz ve vi vo wa wo xh yi yo za zh zu
+""".split())
+# Bare codes that are far more often ordinary termbase columns; write them with a region (id-ID).
+_NOT_LANG_COLUMNS = frozenset({"id"})
+_SOURCE_COLUMNS = ("en", "term", "source")
+_END = ""  # trie key holding the form ids that end at a node
+MIN_PARTIAL_QUERY = 5  # shorter queries only fuzzy-match whole forms
+MATCH_KINDS = ("exact", "prefix", "fuzzy")
+
+
+def fold(text: str) -> str:
+    """Case-, accent- and width-insensitive search key."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+
+def lang_column(name: str) -> str | None:
+    """Normalized language code for a CSV header (fr, pt-BR, zh_Hans), or None for other columns."""
+    code = normalize_lang(name)
+    match = _LANG_COLUMN.match(code)
+    if not match or match.group(1) not in _ISO_639_1 or code in _NOT_LANG_COLUMNS:
+        return None
+    return code
+
+
+def trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class GlossaryEntry(NamedTuple):
+    term: str
+    lang: str
+    translations: dict
+
+
+class GlossaryMatch(NamedTuple):
+    entry_id: int
+    form: str
+    lang: str
+    kind: str
+    score: float
+
+
+class Glossary:
+    """
+    Termbase indexed for search-as-you-type.
+
+    Example:
+        glossary = Glossary()
+        glossary.add("Machine Learning", {"fr": "Apprentissage automatique", "zh": "机器学习"})
+        glossary.search("machin")            # prefix match
+        glossary.search("aprentissage")      # fuzzy, reverse (FR → EN entry)
+    """
+
+    def __init__(self, source_lang: str = "en"):
+        self.source_lang = source_lang
+        self.entries: list[GlossaryEntry] = []
+        self.languages: list[str] = [source_lang]
+        self._form_text: list[str] = []
+        self._form_key: list[str] = []
+        self._form_lang: list[str] = []
+        self._form_entry = array("I")
+        self._form_grams = array("H")
+        self._trie: dict = {}
+        self._postings: dict[str, array] = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    # ---- building ----
+
+    def _add_form(self, text: str, lang: str, entry_id: int):
+        key = fold(text)
+        if not key:
+            return
+        form_id = len(self._form_text)
+        self._form_text.append(text)
+        self._form_key.append(key)
+        self._form_lang.append(lang)
+        self._form_entry.append(entry_id)
+
+        node = self._trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(_END, []).append(form_id)
+
+        grams = trigrams(key)
+        self._form_grams.append(min(len(grams), 0xFFFF))
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = array("I")
+            posting.append(form_id)
+
+    def add(self, term: str, translations: dict, lang: str | None = None, synonyms: dict | None = None) -> int:
+        """Add one concept; every term (and synonym) becomes searchable in its language."""
+        lang = (lang or self.source_lang).lower()
+        translations = {l.lower(): t for l, t in translations.items() if t}
+        entry_id = len(self.entries)
+        self.entries.append(GlossaryEntry(term, lang, translations))
+        for code in [lang, *translations]:
+            if code not in self.languages:
+                self.languages.append(code)
+        self._add_form(term, lang, entry_id)
+        for code, text in translations.items():
+            self._add_form(text, code, entry_id)
+        for code, texts in (synonyms or {}).items():
+            for text in texts:
+                self._add_form(text, code.lower(), entry_id)
+        return entry_id
+
+    def load_csv(self, binary) -> int:
+        """
+        One concept per row. The source column is `en`, `term` or `source`
+        (else the first column); other columns named with an ISO 639-1 code,
+        optionally with subtags (fr, zh, pt-BR, ...), are translations; "id"
+        is an identifier column, Indonesian needs a region (id-ID).
+        Returns entries added.
+        """
+        binary.seek(0)
+        stream = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+        added = 0
+        try:
+            reader = csv.DictReader(stream)
+            fields = reader.fieldnames or []
+            lowered = {f.strip().lower(): f for f in fields}
+            source = next((lowered[c] for c in _SOURCE_COLUMNS if c in lowered), fields[0] if fields else None)
+            targets = {f: lang_column(f) for f in fields if f != source}
+            targets = {f: code for f, code in targets.items() if code}
+            for row in reader:
+                term = (row.get(source) or "").strip()
+                if term:
+                    self.add(term, {code: (row.get(f) or "").strip() for f, code in targets.items()})
+                    added += 1
+        finally:
+            stream.detach()
+        return added
+
+    def load_tbx(self, binary) -> int:
+        """
+        Stream <termEntry> (TBX 2) or <conceptEntry> (TBX 3) elements. The
+        source term is the English one when present, else the first language;
+        the first term per language is the translation, the others synonyms.
+        """
+        binary.seek(0)
+        added = 0
+        for concept, _ in iter_elements(binary, {"termEntry", "conceptEntry"}):
+            terms = {}
+            for lang_set in concept:
+                if local_name(lang_set.tag) not in ("langSet", "langSec"):
+                    continue
+                lang = (lang_set.get(XML_LANG) or lang_set.get("lang") or "").lower()
+                texts = [
+                    "".join(node.itertext()).strip()
+                    for node in lang_set.iter()
+                    if local_name(node.tag) == "term"
+                ]
+                texts = [t for t in texts if t]
+                if lang and texts:
+                    terms.setdefault(lang, []).extend(texts)
+            if not terms:
+                continue
+            source = self.source_lang if self.source_lang in terms else next(iter(terms))
+            self.add(
+                terms[source][0],
+                {lang: texts[0] for lang, texts in terms.items() if lang != source},
+                lang=source,
+                synonyms={lang: texts[1:] for lang, texts in terms.items() if len(texts) > 1},
+            )
+            added += 1
+        return added
+
+    def load(self, binary, name: str) -> int:
+        return self.load_tbx(binary) if name.lower().endswith((".tbx", ".xml")) else self.load_csv(binary)
+
+    # ---- search ----
+
+    def _lang_ok(self, form_id: int, lang: str | None) -> bool:
+        return lang is None or self._form_lang[form_id] == lang
+
+    def prefix(self, query: str, limit: int = 10, lang: str | None = None) -> list[GlossaryMatch]:
+        """Forms starting with `query`, shortest first (breadth-first over the trie)."""
+        key = fold(query)
+        node = self._trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return []
+        matches, level = [], [node]
+        while level and len(matches) < limit:
+            next_level = []
+            for node in level:
+                for child_key, child in node.items():
+                    if child_key == _END:
+                        for form_id in child:
+                            if self._lang_ok(form_id, lang):
+                                form = self._form_key[form_id]
+                                kind = "exact" if form == key else "prefix"
+                                matches.append(self._match(form_id, kind, len(key) / len(form)))
+                    else:
+                        next_level.append(child)
+            level = next_level
+        return matches[:limit]
+
+    def fuzzy(self, query: str, limit: int = 10, lang: str | None = None, min_similarity: float = 0.6,
+              max_candidates: int = 50) -> list[GlossaryMatch]:
+        """
+        Typo-tolerant lookup: forms sharing the most trigrams with `query` are
+        shortlisted by Dice coefficient, then ranked by edit-distance similarity
+        to the whole form or, while the user is still typing, to its beginning.
+        """
+        key = fold(query)
+        grams = trigrams(key)
+        postings = [self._postings[g] for g in grams if g in self._postings]
+        if not key or not postings:
+            return []
+        ids = np.concatenate([np.frombuffer(p, dtype=np.uint32) for p in postings])
+        shared = np.bincount(ids, minlength=len(self._form_key))
+        candidates = np.flatnonzero(shared)
+        dice = 2 * shared[candidates] / (len(grams) + np.frombuffer(self._form_grams, dtype=np.uint16)[candidates])
+        order = candidates[np.argsort(-dice, kind="stable")]
+
+        matches = []
+        for form_id in order[:max_candidates * 4].tolist():
+            if not self._lang_ok(form_id, lang):
+                continue
+            form = self._form_key[form_id]
+            score = 0.0
+            partial = len(key) >= MIN_PARTIAL_QUERY and len(form) > len(key)
+            for target in (form, form[:len(key)]) if partial else (form,):
+                limit_distance = max_distance_for(min_similarity, max(len(key), len(target)))
+                distance = levenshtein(key, target, limit_distance)
+                if distance <= limit_distance:
+                    score = max(score, similarity(key, target, distance))
+            if score:
+                matches.append(self._match(form_id, "fuzzy", score))
+            if len(matches) >= max_candidates:
+                break
+        matches.sort(key=lambda m: -m.score)
+        return matches[:limit]
+
+    def search(self, query: str, limit: int = 10, lang: str | None = None) -> list[GlossaryMatch]:
+        """Exact, then prefix, then fuzzy matches; one (best) match per entry."""
+        best: dict[int, GlossaryMatch] = {}
+        for match in self.prefix(query, limit * 2, lang) + self.fuzzy(query, limit * 2, lang):
+            current = best.get(match.entry_id)
+            if current is None or self._rank(match) < self._rank(current):
+                best[match.entry_id] = match
+        return sorted(best.values(), key=self._rank)[:limit]
+
+    @staticmethod
+    def _rank(match: GlossaryMatch):
+        return MATCH_KINDS.index(match.kind), -match.score
+
+    def _match(self, form_id: int, kind: str, score: float) -> GlossaryMatch:
+        return GlossaryMatch(
+            self._form_entry[form_id], self._form_text[form_id], self._form_lang[form_id], kind, round(score, 3)
+        )
+
+    def entry(self, entry_id: int) -> GlossaryEntry:
+        return self.entries[entry_id]
+
+    def iter_forms(self):
+        """(entry id, language, text) for every indexed term, translation and synonym."""
+        return zip(self._form_entry, self._form_lang, self._form_text)
@@ -0,0 +1,157 @@
+# keywords.py
+# Corpus-level keyword extraction: an incrementally updated document-frequency
+# index with vectorized TF-IDF / BM25 scoring over sparse term-count matrices.
+import hashlib
+import re
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from ls_nlp.langid import detect_languages
+from ls_nlp.segmentation import segment_batch
+from ls_nlp.stopwords import stopwords_for
+
+_WORD = re.compile(r"\w+")
+METHODS = ("bm25", "tfidf")
+
+
+def tokenize(text: str, lang: str) -> list[str]:
+    """Lowercased word tokens without stopwords, digits or one-letter words (Latin scripts)."""
+    stop = stopwords_for(lang)
+    return [
+        w for w in _WORD.findall(text.lower())
+        if len(w) > 1 and not w.isdigit() and w not in stop
+    ]
+
+
+def tokenize_batch(texts: list[str], langs: list[str] | None = None) -> list[list[str]]:
+    """Tokenize many texts; Chinese ones are segmented with jieba in one batch."""
+    langs = langs or detect_languages(texts)
+    tokens = [None] * len(texts)
+    zh = [i for i, lang in enumerate(langs) if lang == "zh"]
+    if zh:
+        stop = stopwords_for("zh")
+        for i, words in zip(zh, segment_batch([texts[i] for i in zh])):
+            tokens[i] = [w for w in words if _WORD.fullmatch(w) and not w.isdigit() and w not in stop]
+    for i, lang in enumerate(langs):
+        if tokens[i] is None:
+            tokens[i] = tokenize(texts[i], lang)
+    return tokens
+
+
+class KeywordIndex:
+    """
+    Document-frequency index that grows as document batches are added.
+    Documents already seen (by content hash) do not count twice towards DF.
+
+    Example:
+        index = KeywordIndex()
+        counts = index.add_documents(texts)          # sparse docs x terms counts
+        index.top_keywords(index.score(counts), 5)   # [[(term, score), ...], ...]
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: dict[str, int] = {}
+        self.terms: list[str] = []
+        self.df = np.zeros(0, dtype=np.int64)
+        self.n_docs = 0
+        self.total_tokens = 0
+        self._seen: set[bytes] = set()
+
+    def __len__(self):
+        return self.n_docs
+
+    def _counts(self, token_lists) -> csr_matrix:
+        indptr, indices, data = [0], [], []
+        for tokens in token_lists:
+            row = {}
+            for token in tokens:
+                term_id = self.vocab.get(token)
+                if term_id is None:
+                    term_id = self.vocab[token] = len(self.terms)
+                    self.terms.append(token)
+                row[term_id] = row.get(term_id, 0) + 1
+            indices.extend(row.keys())
+            data.extend(row.values())
+            indptr.append(len(indices))
+        return csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+            shape=(len(token_lists), len(self.terms)),
+        )
+
+    def add_documents(self, texts: list[str], langs: list[str] | None = None) -> csr_matrix:
+        """Tokenize `texts`, update DF statistics and return their term-count matrix."""
+        counts = self._counts(tokenize_batch(texts, langs))
+
+        fresh = []
+        for i, text in enumerate(texts):
+            digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+            if digest not in self._seen:
+                self._seen.add(digest)
+                fresh.append(i)
+
+        if len(self.df) < len(self.terms):
+            self.df = np.concatenate([self.df, np.zeros(len(self.terms) - len(self.df), dtype=np.int64)])
+        if fresh:
+            new = counts[fresh]
+            # One stored entry per (document, term): counting column indices gives DF.
+            self.df += np.bincount(new.indices, minlength=len(self.terms))
+            self.n_docs += len(fresh)
+            self.total_tokens += int(new.sum())
+        return counts
+
+    def idf(self, method: str = "bm25") -> np.ndarray:
+        n, df = max(self.n_docs, 1), self.df.astype(np.float64)
+        if method == "bm25":
+            return np.log1p((n - df + 0.5) / (df + 0.5))
+        return np.log((1 + n) / (1 + df)) + 1  # smoothed idf
+
+    def score(self, counts: csr_matrix, method: str = "bm25") -> csr_matrix:
+        """Weight a term-count matrix from add_documents() with TF-IDF or BM25."""
+        if method not in METHODS:
+            raise ValueError(f"Unknown scoring method {method!r}; expected one of {METHODS}")
+        counts = counts.tocsr()
+        if counts.shape[1] < len(self.terms):
+            counts.resize((counts.shape[0], len(self.terms)))
+        weights = counts.astype(np.float64, copy=True)
+        tf = weights.data
+
+        if method == "bm25":
+            doc_len = np.asarray(counts.sum(axis=1)).ravel()
+            avg_len = self.total_tokens / self.n_docs if self.n_docs else max(doc_len.mean(), 1.0)
+            norm = self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+            weights.data = tf * (self.k1 + 1) / (tf + np.repeat(norm, np.diff(counts.indptr)))
+        else:
+            weights.data = 1 + np.log(tf)  # sublinear tf
+
+        weights.data *= self.idf(method)[weights.indices]
+        return weights
+
+    def top_keywords(self, scores: csr_matrix, top_n: int = 5) -> list[list[tuple[str, float]]]:
+        """Best `top_n` terms per row of a score matrix."""
+        results = []
+        for row in range(scores.shape[0]):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            data, cols = scores.data[start:end], scores.indices[start:end]
+            if len(data) > top_n:
+                best = np.argpartition(-data, top_n)[:top_n]
+            else:
+                best = np.arange(len(data))
+            best = best[np.argsort(-data[best], kind="stable")]
+            results.append([(self.terms[cols[i]], float(data[i])) for i in best])
+        return results
+
+    def column_totals(self, scores: csr_matrix) -> np.ndarray:
+        """Summed score per term (dense vector over the vocabulary)."""
+        return np.asarray(scores.sum(axis=0)).ravel()
+
+    def rank_terms(self, totals: np.ndarray, top_n: int = 20) -> list[tuple[str, float]]:
+        """Corpus keywords: best `top_n` terms by column_totals(), summed over score chunks."""
+        best = np.argsort(-totals, kind="stable")[:top_n]
+        return [(self.terms[i], float(totals[i])) for i in best if totals[i] > 0]
+
+    def extract(self, texts: list[str], top_n: int = 5, method: str = "bm25"):
+        """Add `texts` to the index and return their top keywords."""
+        return self.top_keywords(self.score(self.add_documents(texts), method), top_n)
@@ -0,0 +1,99 @@
+# langid.py
+# Deterministic language identification on top of langdetect's character n-gram profiles.
+# Profiles are loaded once per process; detection is seeded, so the same text
+# always gets the same label.
+import threading
+
+from langdetect.detector_factory import DetectorFactory, PROFILES_DIRECTORY
+from langdetect.lang_detect_exception import LangDetectException
+
+SEED = 0
+CONFIDENCE_THRESHOLD = 0.90
+# Prefix lengths tried in turn on long texts; stop at the first confident answer.
+PROBE_LENGTHS = (300, 1200, 5000, 10000)
+
+_factory = None
+_factory_lock = threading.Lock()
+
+
+def _get_factory() -> DetectorFactory:
+    global _factory
+    with _factory_lock:
+        if _factory is None:
+            factory = DetectorFactory()
+            factory.load_profile(PROFILES_DIRECTORY)
+            factory.seed = SEED
+            _factory = factory
+        return _factory
+
+
+def _normalize(lang: str) -> str:
+    return "zh" if lang.startswith("zh") else lang
+
+
+def _script_hint(text: str) -> str | None:
+    """
+    Cheap script check on a short sample: Hangul -> ko, kana -> ja,
+    Han without kana -> zh. Returns None for everything else.
+    """
+    han = kana = hangul = letters = 0
+    for ch in text[:200]:
+        if not ch.isalpha():
+            continue
+        letters += 1
+        code = ord(ch)
+        if 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF:
+            han += 1
+        elif 0x3040 <= code <= 0x30FF:
+            kana += 1
+        elif 0xAC00 <= code <= 0xD7AF:
+            hangul += 1
+    if not letters:
+        return None
+    if hangul / letters > 0.5:
+        return "ko"
+    if kana / letters > 0.1:
+        return "ja"
+    if han / letters > 0.8:
+        return "zh"
+    return None
+
+
+def detect_language_with_confidence(text: str, threshold: float = CONFIDENCE_THRESHOLD) -> tuple[str, float]:
+    """
+    Return (language code, probability). Chinese variants are folded into "zh".
+    Long texts are probed on growing prefixes and exit early once the top
+    language reaches `threshold`.
+    """
+    text = text.strip()
+    if not text:
+        return "unknown", 0.0
+
+    hint = _script_hint(text)
+    if hint:
+        return hint, 1.0
+
+    factory = _get_factory()
+    best = ("unknown", 0.0)
+    for limit in PROBE_LENGTHS:
+        detector = factory.create()
+        detector.set_max_text_length(limit)
+        detector.append(text[:limit])  # slice first: append() runs regexes over its whole input
+        try:
+            top = detector.get_probabilities()
+        except LangDetectException:
+            top = []
+        if top:
+            best = (_normalize(top[0].lang), top[0].prob)
+        if best[1] >= threshold or len(text) <= limit:
+            break
+    return best
+
+
+def detect_language(text: str) -> str:
+    return detect_language_with_confidence(text)[0]
+
+
+def detect_languages(texts, threshold: float = CONFIDENCE_THRESHOLD) -> list[str]:
+    """Batch API: one code per input text, sharing the loaded profiles."""
+    return [detect_language_with_confidence(text, threshold)[0] for text in texts]
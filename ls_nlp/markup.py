@@ -0,0 +1,163 @@
+# markup.py
+# Incremental HTML/XML to text conversion built on html.parser.
+# Entities are unescaped, script/style bodies dropped and block elements
+# turned into line breaks; input can be fed in chunks of any size.
+import re
+from html.parser import HTMLParser
+
+BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table",
+    "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul",
+})
+SKIP_TAGS = frozenset({"script", "style", "noscript", "template"})
+
+_SPACES = re.compile(r"[ \t\r\n\f\v]+")
+_LINE_EDGES = re.compile(r" *\n[ \n]*")
+_BREAK = "\0"  # block boundary marker; newlines inside markup text are only layout
+MAX_TAG_LENGTH = 2048
+
+
+def _escape_stray_brackets(data: str, final: bool) -> tuple[str, str]:
+    """
+    Escape every "<" with no ">" within MAX_TAG_LENGTH characters, so malformed
+    markup is read as text instead of making the parser rescan it. Unless
+    `final`, a trailing "<" that may still be closed by the next chunk is
+    returned separately as the pending tail.
+    """
+    parts, start, gt = [], 0, -1
+    lt = data.find("<")
+    while lt != -1:
+        if gt < lt:
+            gt = data.find(">", lt)
+        if gt == -1 and not final and len(data) - lt < MAX_TAG_LENGTH:
+            parts.append(data[start:lt])
+            return "".join(parts), data[lt:]
+        if gt == -1 or gt - lt > MAX_TAG_LENGTH:
+            parts.append(data[start:lt])
+            parts.append("&lt;")
+            start = lt + 1
+        lt = data.find("<", lt + 1)
+    parts.append(data[start:])
+    return "".join(parts), ""
+
+
+class TagStripper(HTMLParser):
+    """
+    Streaming tag stripper.
+
+    Example:
+        stripper = TagStripper()
+        for chunk in chunks:
+            stripper.feed(chunk)
+            text = stripper.drain()    # text completed so far
+        stripper.close()
+        text = stripper.drain()
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts: list[str] = []
+        self._skip = 0
+        self._last = _BREAK  # last character emitted, kept across drain() calls
+        self._pending = ""
+
+    def feed(self, data: str):
+        data, self._pending = _escape_stray_brackets(self._pending + data, final=False)
+        super().feed(data)
+
+    def close(self):
+        data, self._pending = _escape_stray_brackets(self._pending, final=True)
+        super().feed(data)
+        super().close()
+
+    def _break(self):
+        if self._last != _BREAK:
+            self._parts.append(_BREAK)
+            self._last = _BREAK
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag in BLOCK_TAGS:
+            self._break()
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in BLOCK_TAGS:
+            self._break()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._break()
+
+    def handle_data(self, data):
+        if self._skip or not data:
+            return
+        if _BREAK in data:
+            data = data.replace(_BREAK, "")
+            if not data:
+                return
+        self._parts.append(data)
+        self._last = data[-1]
+
+    def unknown_decl(self, data):
+        # <![CDATA[...]]> sections in XML keep their content.
+        if data.startswith("CDATA["):
+            self.handle_data(data[6:])
+
+    def drain(self) -> str:
+        """Return the text produced since the last drain(), whitespace collapsed per line."""
+        text = _SPACES.sub(" ", "".join(self._parts)).replace(_BREAK, "\n")
+        self._parts = []
+        return _LINE_EDGES.sub("\n", text)
+
+
+def strip_tags(text: str) -> str:
+    """Plain text of an HTML/XML string."""
+    stripper = TagStripper()
+    stripper.feed(text)
+    stripper.close()
+    return stripper.drain().strip()
+
+
+def iter_strip_tags(chunks):
+    """Yield plain text pieces for an iterable of markup chunks, with bounded memory."""
+    stripper = TagStripper()
+    for chunk in chunks:
+        stripper.feed(chunk)
+        text = stripper.drain()
+        if text:
+            yield text
+    stripper.close()
+    text = stripper.drain()
+    if text:
+        yield text
+
+
+if __name__ == "__main__":
+    # Throughput against the previous single-regex stripper: python -m ls_nlp.markup
+    import time
+
+    regex = re.compile(r"</?[^>]+>")
+    page = (
+        "<html><head><style>p { color: red; }</style><script>var a = 1 < 2;</script></head><body>"
+        + "<div class='post'><h2>Title &amp; more</h2><p>Some <b>bold</b> and <a href='#'>linked</a>"
+        " text &eacute;t&eacute;.</p><ul><li>one</li><li>two</li></ul></div>" * 20_000
+        + "</body></html>"
+    )
+    size_mb = len(page.encode("utf-8")) / 1e6
+    for name, strip in (("regex", lambda s: regex.sub("", s)), ("html.parser", strip_tags)):
+        started = time.perf_counter()
+        out = strip(page)
+        elapsed = time.perf_counter() - started
+        print(f"{name:12s} {size_mb / elapsed:7.1f} MB/s  ({size_mb:.1f} MB, {len(out):,} chars out)")
+    broken = "<a " * 20_000
+    started = time.perf_counter()
+    regex.sub("", broken)
+    print(f"regex on unterminated tag: {time.perf_counter() - started:.3f}s")
+    started = time.perf_counter()
+    strip_tags(broken)
+    print(f"html.parser on unterminated tag: {time.perf_counter() - started:.3f}s")
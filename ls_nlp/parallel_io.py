@@ -0,0 +1,173 @@
+# parallel_io.py
+# Streaming readers and writers for parallel data (TMX 1.4, XLIFF 1.2/2.x, JSONL).
+# Writers are generators of text chunks and readers parse incrementally, so
+# files of any size are processed with bounded memory.
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+
+from ls_nlp.bulk import new_output_path
+
+# Characters that are not allowed anywhere in an XML 1.0 document.
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+CHUNK_UNITS = 500
+
+
+def xml_text(text: str) -> str:
+    return escape(_INVALID_XML.sub("", text))
+
+
+def iter_tmx(pairs, src_lang: str, tgt_lang: str, creation_tool: str = "Lingua Synapse"):
+    """Yield a TMX 1.4 document for (source, target) pairs, a few hundred units per chunk."""
+    src_attr, tgt_attr = quoteattr(src_lang), quoteattr(tgt_lang)
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<tmx version="1.4">\n'
+        f'  <header creationtool={quoteattr(creation_tool)} creationtoolversion="1.0" '
+        f'segtype="sentence" o-tmf="plain" adminlang="en" srclang={src_attr} datatype="plaintext"/>\n'
+        "  <body>\n"
+    )
+    buffer = []
+    for i, (src, tgt) in enumerate(pairs, start=1):
+        buffer.append(
+            f'    <tu tuid="{i}">\n'
+            f"      <tuv xml:lang={src_attr}><seg>{xml_text(src)}</seg></tuv>\n"
+            f"      <tuv xml:lang={tgt_attr}><seg>{xml_text(tgt)}</seg></tuv>\n"
+            "    </tu>\n"
+        )
+        if len(buffer) >= CHUNK_UNITS:
+            yield "".join(buffer)
+            buffer.clear()
+    if buffer:
+        yield "".join(buffer)
+    yield "  </body>\n</tmx>\n"
+
+
+def iter_jsonl(pairs, src_lang: str, tgt_lang: str):
+    """Yield JSON Lines ({source, target, src_lang, tgt_lang}) in chunks."""
+    buffer = []
+    for src, tgt in pairs:
+        buffer.append(json.dumps({
+            "source": src,
+            "target": tgt,
+            "src_lang": src_lang,
+            "tgt_lang": tgt_lang
+        }, ensure_ascii=False) + "\n")
+        if len(buffer) >= CHUNK_UNITS:
+            yield "".join(buffer)
+            buffer.clear()
+    if buffer:
+        yield "".join(buffer)
+
+
+def write_chunks(chunks, path: str) -> int:
+    """Write text chunks to `path`; returns the number of characters written."""
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for chunk in chunks:
+            written += f.write(chunk)
+    return written
+
+
+def export_file(chunks, suffix: str = ".txt"):
+    """
+    Binary file object for a download button: the chunks are streamed to a
+    temp file (write_chunks), which is opened for reading and then unlinked,
+    so it disappears once the handle is closed.
+    """
+    path = new_output_path(suffix)
+    try:
+        write_chunks(chunks, path)
+        return open(path, "rb")
+    finally:
+        try:
+            os.remove(path)
+        except OSError:  # the file is still open on Windows; left to the temp dir cleanup
+            pass
+
+
+# -------------------------------------------------
+# Readers
+# -------------------------------------------------
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+
+def local_name(tag: str) -> str:
+    """Tag name without its namespace."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def find_child(elem, name: str):
+    """First direct child with local name `name`, or None."""
+    for node in elem:
+        if local_name(node.tag) == name:
+            return node
+    return None
+
+
+def element_text(elem) -> str:
+    # itertext() keeps the text inside inline markup (<bpt>, <ph>, <g>, ...)
+    return "".join(elem.itertext()).strip() if elem is not None else ""
+
+
+def iter_elements(source, tags: set):
+    """
+    iterparse `source`, yielding (element, ancestors) at the end of each element
+    whose local name is in `tags`. The element is cleared and detached from its
+    parent afterwards, so the parsed tree never grows beyond one unit.
+    """
+    stack = []
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if local_name(elem.tag) in tags:
+            yield elem, stack
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+
+def iter_tmx_units(source):
+    """Yield {language: segment} per <tu>, in document order of its <tuv>s."""
+    for tu, _ in iter_elements(source, {"tu"}):
+        segments = {}
+        for tuv in tu:
+            if local_name(tuv.tag) != "tuv":
+                continue
+            lang = tuv.get(XML_LANG) or tuv.get("lang")
+            text = element_text(find_child(tuv, "seg"))
+            if lang and text:
+                segments[lang] = text
+        if segments:
+            yield segments
+
+
+def iter_xliff_units(source):
+    """
+    Yield {language: segment} per XLIFF 1.2 <trans-unit> or 2.x <segment>.
+    Languages come from <file source-language/target-language> (1.2) or
+    <xliff srcLang/trgLang> (2.x).
+    """
+    for unit, ancestors in iter_elements(source, {"trans-unit", "segment"}):
+        src_lang = tgt_lang = None
+        for ancestor in reversed(ancestors):
+            src_lang = src_lang or ancestor.get("source-language") or ancestor.get("srcLang")
+            tgt_lang = tgt_lang or ancestor.get("target-language") or ancestor.get("trgLang")
+        source_text = element_text(find_child(unit, "source"))
+        target_text = element_text(find_child(unit, "target"))
+        if source_text and target_text:
+            yield {src_lang or "und": source_text, tgt_lang or "und-target": target_text}
+
+
+def iter_tm_units(source, fmt: str):
+    """fmt: 'tmx' or 'xliff'."""
+    return iter_tmx_units(source) if fmt == "tmx" else iter_xliff_units(source)
+
+
+def tm_format(name: str) -> str:
+    return "xliff" if name.lower().endswith((".xlf", ".xliff", ".sdlxliff")) else "tmx"
@@ -0,0 +1,97 @@
+# segmentation.py
+# Chinese word segmentation service around jieba.
+# The prefix dictionary is built once per process (from jieba's on-disk cache
+# when present); large inputs are segmented across the shared worker pool.
+import os
+import re
+import threading
+from functools import partial
+
+import jieba
+
+from ls_nlp.workers import imap_bounded
+
+# Inputs smaller than this are segmented in-process: pool overhead would dominate.
+PARALLEL_MIN_CHARS = 200_000
+PIECE_CHARS = 50_000
+
+_init_lock = threading.Lock()
+_cache_dir = None
+
+# Split points that never fall inside a word: line breaks and CJK sentence punctuation.
+_BOUNDARY = re.compile(r"(?<=[\n。！？；])")
+
+
+def init_jieba(cache_dir: str | None = None):
+    """
+    Load jieba's dictionary now rather than on the first cut() call.
+    `cache_dir` keeps jieba.cache somewhere persistent instead of the system temp dir.
+    """
+    global _cache_dir
+    with _init_lock:
+        if jieba.dt.initialized:
+            return
+        if cache_dir:
+            _cache_dir = cache_dir
+            os.makedirs(cache_dir, exist_ok=True)
+            jieba.dt.tmp_dir = cache_dir
+        jieba.initialize()
+
+
+def segment(text: str) -> list[str]:
+    init_jieba()
+    return jieba.lcut(text)
+
+
+def _segment_pieces(pieces: list[str], cache_dir: str | None = None) -> list[list[str]]:
+    # Worker entry point. The shared pool also runs jobs that never need jieba,
+    # so each worker loads the dictionary on its first segmentation call,
+    # from the parent's on-disk cache.
+    init_jieba(cache_dir)
+    return [jieba.lcut(piece) for piece in pieces]
+
+
+def split_pieces(text: str, size: int = PIECE_CHARS) -> list[str]:
+    """Cut text into pieces of roughly `size` chars at sentence/line boundaries."""
+    pieces, current, length = [], [], 0
+    for part in _BOUNDARY.split(text):
+        current.append(part)
+        length += len(part)
+        if length >= size:
+            pieces.append("".join(current))
+            current, length = [], 0
+    if current:
+        pieces.append("".join(current))
+    return pieces
+
+
+def segment_batch(texts: list[str], parallel: bool | None = None) -> list[list[str]]:
+    """
+    Segment many texts, one token list per input.
+    Runs in the shared worker pool when the combined input is large (or `parallel=True`).
+    """
+    if parallel is None:
+        parallel = (os.cpu_count() or 1) > 1 and sum(len(t) for t in texts) >= PARALLEL_MIN_CHARS
+    if not parallel:
+        return [segment(text) for text in texts]
+
+    # Split every text into pieces, segment all pieces in the pool, then stitch back.
+    owners, pieces = [], []
+    for i, text in enumerate(texts):
+        for piece in split_pieces(text):
+            owners.append(i)
+            pieces.append(piece)
+
+    batch = 8
+    batches = (pieces[i:i + batch] for i in range(0, len(pieces), batch))
+
+    results = [[] for _ in texts]
+    owner_iter = iter(owners)
+    for segmented in imap_bounded(partial(_segment_pieces, cache_dir=_cache_dir), batches):
+        for tokens in segmented:
+            results[next(owner_iter)].extend(tokens)
+    return results
+
+
+def segment_large(text: str) -> list[str]:
+    return segment_batch([text])[0]
@@ -0,0 +1,143 @@
+# sentiment.py
+# Sentiment model construction for the available CPU backends.
+#   torch: full-precision transformers pipeline (default)
+#   int8:  dynamically quantized Linear layers, exported once and cached on disk
+import os
+import threading
+
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+from transformers.pipelines import pipeline
+
+#SENTIMENT_MODEL = "tabularisai/multilingual-sentiment-analysis" #returns Positive/Negative/Neutral; heavier
+SENTIMENT_MODEL = "nlptown/bert-base-multilingual-uncased-sentiment" #returns 1-5 star ratings; lightweight
+#SENTIMENT_MODEL = "cardiffnlp/twitter-xlm-roberta-base-sentiment" #Twitter-specific model; requires extra preprocessing; faster loading but less stable and slightly weaker Chinese support
+
+BACKENDS = ("torch", "int8")
+INT8_WEIGHTS = "model.int8.pt"
+
+
+def int8_artifact_dir(model_name: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, model_name.replace("/", "__") + "-int8")
+
+
+def _quantize(model):
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_int8_model(model_name: str, cache_dir: str) -> str:
+    """
+    Quantize the model's Linear layers to int8 and save weights, config and
+    tokenizer side by side, so later loads need neither the fp32 weights nor the hub.
+    """
+    import torch
+
+    target = int8_artifact_dir(model_name, cache_dir)
+    os.makedirs(target, exist_ok=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    quantized = _quantize(model)
+
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(target)
+    model.config.save_pretrained(target)
+    tmp = os.path.join(target, INT8_WEIGHTS + ".tmp")
+    torch.save(quantized.state_dict(), tmp)
+    os.replace(tmp, os.path.join(target, INT8_WEIGHTS))  # atomic: concurrent replicas never see half a file
+    return target
+
+
+def load_int8_model(model_name: str, cache_dir: str):
+    """Return (quantized model, tokenizer), exporting the artifact on first use."""
+    import torch
+
+    target = int8_artifact_dir(model_name, cache_dir)
+    if not os.path.exists(os.path.join(target, INT8_WEIGHTS)):
+        export_int8_model(model_name, cache_dir)
+
+    config = AutoConfig.from_pretrained(target)
+    model = _quantize(AutoModelForSequenceClassification.from_config(config).eval())
+    model.load_state_dict(torch.load(os.path.join(target, INT8_WEIGHTS), weights_only=False))
+    return model.eval(), AutoTokenizer.from_pretrained(target)
+
+
+def build_sentiment_pipeline(model_name: str = SENTIMENT_MODEL, backend: str = "torch", cache_dir: str = "./.cache/models"):
+    if backend == "torch":
+        return pipeline("sentiment-analysis", model=model_name)
+    if backend == "int8":
+        model, tokenizer = load_int8_model(model_name, cache_dir)
+        return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+    raise ValueError(f"Unknown sentiment backend {backend!r}; expected one of {BACKENDS}")
+
+
+_PIPELINES = {}
+_PIPELINES_LOCK = threading.Lock()
+
+
+def get_sentiment_pipeline(model_name: str = SENTIMENT_MODEL, backend: str = "torch", cache_dir: str = "./.cache/models"):
+    """
+    Process-wide pipeline instance. Loads at most once per configuration;
+    concurrent callers (e.g. the warm-up thread and a first request) wait on the same load.
+    """
+    key = (model_name, backend, cache_dir)
+    with _PIPELINES_LOCK:
+        if key not in _PIPELINES:
+            _PIPELINES[key] = build_sentiment_pipeline(model_name, backend, cache_dir)
+        return _PIPELINES[key]
+
+
+def warm_up_sentiment(model_name: str = SENTIMENT_MODEL, backend: str = "torch", cache_dir: str = "./.cache/models"):
+    """Load the pipeline and run one dummy inference so lazy kernels are initialized too."""
+    sentiment = get_sentiment_pipeline(model_name, backend, cache_dir)
+    sentiment(["Warm-up sentence."], truncation=True)
+
+
+def analyze_long_document(sentiment, text: str, window: int = 512, stride: int = 128, batch_size: int = 16) -> dict:
+    """
+    Sentiment for texts longer than the model limit.
+    Tokenizes once, slices overlapping windows of `window` tokens (`stride` tokens shared
+    between neighbours), scores them as padded batches and averages the star
+    probabilities weighted by each window's token count.
+    Returns {"label", "score", "windows": [{"start", "end", "tokens", "label", "score"}]},
+    where start/end are character offsets into `text`.
+    """
+    import torch
+
+    tokenizer, model = sentiment.tokenizer, sentiment.model
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    ids, offsets = encoding["input_ids"], encoding["offset_mapping"]
+    if not ids:
+        return {"label": None, "score": 0.0, "windows": []}
+
+    body = window - tokenizer.num_special_tokens_to_add()  # room for [CLS] / [SEP]
+    step = max(body - stride, 1)
+    starts = list(range(0, max(len(ids) - body, 0) + 1, step))
+    if starts[-1] + body < len(ids):
+        starts.append(len(ids) - body)
+    spans = [(s, min(s + body, len(ids))) for s in starts]
+
+    probs = []
+    with torch.inference_mode():
+        for i in range(0, len(spans), batch_size):
+            batch = [tokenizer.build_inputs_with_special_tokens(ids[s:e]) for s, e in spans[i:i + batch_size]]
+            inputs = tokenizer.pad({"input_ids": batch}, return_tensors="pt")
+            logits = model(**inputs).logits
+            probs.append(torch.softmax(logits, dim=-1))
+    probs = torch.cat(probs)
+
+    weights = torch.tensor([e - s for s, e in spans], dtype=probs.dtype)
+    overall = (probs * weights[:, None]).sum(dim=0) / weights.sum()
+    id2label = model.config.id2label
+
+    windows = []
+    for (s, e), p in zip(spans, probs):
+        best = int(p.argmax())
+        windows.append({
+            "start": offsets[s][0],
+            "end": offsets[e - 1][1],
+            "tokens": e - s,
+            "label": id2label[best],
+            "score": float(p[best]),
+        })
+    best = int(overall.argmax())
+    return {"label": id2label[best], "score": float(overall[best]), "windows": windows}
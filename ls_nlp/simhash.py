@@ -0,0 +1,126 @@
+# simhash.py
+# 64-bit SimHash fingerprints with a block-permuted table index for
+# Hamming-distance queries (Manku et al., 2007). Each segment costs one 8-byte
+# fingerprint plus a 4-byte id per table, instead of a token set.
+import hashlib
+import itertools
+import math
+from array import array
+
+import numpy as np
+
+BITS = 64
+MAX_DISTANCE = 6  # 28 tables; similarity thresholds above ~0.89
+
+
+def supports(similarity: float) -> bool:
+    """Whether a Jaccard threshold maps to a distance the index can serve."""
+    return hamming_threshold(similarity) <= MAX_DISTANCE
+
+
+def hamming_threshold(similarity: float) -> int:
+    """
+    Map a word-set Jaccard threshold to a Hamming distance over 64 bits.
+    For equal-sized sets cosine = 2J / (1 + J), and SimHash bits differ with
+    probability angle / pi, so the expected distance is 64 * arccos(cos) / pi.
+    Rounding down keeps pairs just under the threshold from matching too often.
+    """
+    similarity = min(max(similarity, 0.0), 1.0)
+    cosine = 2 * similarity / (1 + similarity)
+    return math.floor(BITS * math.acos(min(cosine, 1.0)) / math.pi + 1e-9)
+
+
+def similarity_from_hamming(distance: int) -> float:
+    """Inverse of hamming_threshold: estimated Jaccard for a Hamming distance."""
+    cosine = math.cos(math.pi * distance / BITS)
+    return max(cosine, 0.0) / (2 - max(cosine, 0.0))
+
+
+def _token_hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def fingerprints(token_sets) -> np.ndarray:
+    """One uint64 SimHash per non-empty token set (unweighted), computed in one pass."""
+    lengths = np.fromiter((len(t) for t in token_sets), dtype=np.int64, count=len(token_sets))
+    hashes = np.fromiter(
+        (_token_hash64(tok) for tokens in token_sets for tok in tokens),
+        dtype="<u8",
+        count=int(lengths.sum()),
+    )
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.astype(np.int32) * 2 - 1
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    totals = np.add.reduceat(votes, starts, axis=0)
+    return np.packbits(totals > 0, axis=1, bitorder="little").view("<u8").ravel()
+
+
+class SimHashIndex:
+    """
+    Permuted-table index of Manku et al.: the 64 bits are split into
+    `max_distance + k` blocks, and fingerprints within `max_distance` bits of
+    each other agree exactly on at least k of them (pigeonhole). One table per
+    choice of k blocks buckets fingerprints by those bits, so a query only
+    inspects fingerprints sharing a >= 16-bit key, in C(max_distance + k, k) tables.
+    Tables grow combinatorially with the distance, hence MAX_DISTANCE.
+
+    Example:
+        index = SimHashIndex(max_distance=3)
+        index.add(fp)                  # -> id
+        index.query(other_fp)          # -> (id, distance) of the first match, or None
+    """
+
+    def __init__(self, max_distance: int = 3):
+        if not 0 <= max_distance <= MAX_DISTANCE:
+            raise ValueError(
+                f"max_distance must be between 0 and {MAX_DISTANCE} "
+                f"(similarity above {similarity_from_hamming(MAX_DISTANCE + 1):.2f}); use MinHash below that"
+            )
+        self.max_distance = max_distance
+        key_blocks = max(1, math.ceil(max_distance / 3))  # 64 * k / (d + k) >= 16 key bits
+        blocks = max_distance + key_blocks
+        widths = [BITS // blocks + (i < BITS % blocks) for i in range(blocks)]
+        block_masks, shift = [], 0
+        for width in widths:
+            block_masks.append(((1 << width) - 1) << shift)
+            shift += width
+        self._masks = [sum(combo) for combo in itertools.combinations(block_masks, key_blocks)]
+        self._tables = [{} for _ in self._masks]
+        self.fingerprints = array("Q")
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def _keys(self, fp: int):
+        return [fp & mask for mask in self._masks]
+
+    def add(self, fp: int) -> int:
+        item_id = len(self.fingerprints)
+        self.fingerprints.append(fp)
+        for table, key in zip(self._tables, self._keys(fp)):
+            bucket = table.get(key)
+            if bucket is None:
+                bucket = table[key] = array("I")
+            bucket.append(item_id)
+        return item_id
+
+    def query(self, fp: int):
+        """Lowest id within max_distance of `fp`, with its distance; None if there is none."""
+        # Buckets hold a handful of ids at >= 16 key bits, so plain int XORs beat
+        # one numpy call per table.
+        stored = self.fingerprints
+        best = None
+        for table, key in zip(self._tables, self._keys(fp)):
+            for item_id in table.get(key, ()):
+                if best is not None and item_id >= best[0]:
+                    break  # buckets are in id order
+                distance = (stored[item_id] ^ fp).bit_count()
+                if distance <= self.max_distance:
+                    best = (item_id, distance)
+                    break
+        return best
+
+    def nbytes(self) -> int:
+        """Fingerprints plus bucket ids (dict overhead excluded)."""
+        ids = sum(len(bucket) for table in self._tables for bucket in table.values())
+        return 8 * len(self.fingerprints) + 4 * ids
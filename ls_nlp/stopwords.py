@@ -0,0 +1,49 @@
+# stopwords.py
+# Compact stopword lists for keyword extraction, keyed by language code.
+
+STOPWORDS = {
+    "en": set("""
+        a about above after again against all am an and any are as at be because been before being
+        below between both but by can could did do does doing down during each few for from further
+        had has have having he her here hers herself him himself his how i if in into is it its itself
+        just me more most my myself no nor not now of off on once only or other our ours ourselves out
+        over own same she should so some such than that the their theirs them themselves then there
+        these they this those through to too under until up very was we were what when where which
+        while who whom why will with would you your yours yourself yourselves also may might must
+        shall us one two new get got like make made many much well even still yet
+    """.split()),
+    "fr": set("""
+        au aux avec ce ces dans de des du elle en et eux il ils je la le les leur leurs lui ma mais me
+        même mes moi mon ne nos notre nous on ou où par pas pour qu que qui sa se ses son sur ta te tes
+        toi ton tu un une vos votre vous c d j l m n s t y été étée étées étés étant suis es est sommes
+        êtes sont serai sera serons seront étais était étions étaient fus fut ai as avons avez ont
+        aurai aura avais avait avions avaient eu cette cet ceci cela ça comme aussi plus très tout tous
+        toute toutes bien sans sous entre donc alors ainsi
+    """.split()),
+    "de": set("""
+        aber alle allem allen aller alles als also am an ander andere auch auf aus bei bin bis bist da
+        damit dann das dass dein deine dem den der des dich die dies diese dieser dieses dir doch dort
+        du durch ein eine einem einen einer eines er es euer eure für hatte hatten hier hin hinter ich
+        ihr ihre im in ist ja jede jedem jeden jeder jedes jetzt kann kein keine können machen man mein
+        meine mit muss nach nicht nichts noch nun nur ob oder ohne sehr sein seine sich sie sind so
+        soll sondern um und uns unser unter viel vom von vor war waren was weil welche wenn wer wie wir
+        wird wo zu zum zur über
+    """.split()),
+    "es": set("""
+        a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante e
+        el ella ellas ellos en entre era es esa esas ese eso esos esta estas este esto estos fue ha
+        hay la las le les lo los más me mi mis mucho muy nada ni no nos nosotros o os otra otro para
+        pero poco por porque que quien se sea ser si sin sobre son su sus también te tiene todo todos
+        tu tus un una uno unos y ya yo
+    """.split()),
+    "zh": set("""
+        的 了 和 是 在 我 有 他 她 它 这 那 你 们 我们 你们 他们 她们 它们 就 也 都 而 及 与 或 一个 没有
+        不 很 到 说 要 去 会 着 对 把 被 从 给 让 向 以 之 其 为 于 上 下 中 但 但是 并 并且 因为 所以 如果
+        虽然 还是 已经 这个 那个 这些 那些 什么 怎么 可以 这样 那样 自己 进行 通过 以及 等 等等
+    """.split()),
+}
+
+
+def stopwords_for(lang: str) -> set:
+    """Stopwords for `lang`, plus English ones (mixed-language text is common)."""
+    return STOPWORDS.get(lang, set()) | STOPWORDS["en"]
@@ -0,0 +1,174 @@
+# terminology.py
+# Terminology enforcement: every glossary term is compiled into one
+# Aho-Corasick automaton, so a segment is scanned once regardless of the
+# number of terms. Source terms whose approved translation does not appear
+# in the target are reported.
+import re
+from collections import deque
+from typing import NamedTuple
+
+from ls_nlp.glossary import Glossary
+
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def fold_case(text: str) -> str:
+    """
+    Lowercase char by char, keeping characters whose lowercase is longer
+    ("İ" -> "i̇"), so offsets into the folded text are offsets into `text`.
+    """
+    return "".join(low if len(low := char.lower()) == 1 else char for char in text)
+
+
+def _is_word_char(char: str) -> bool:
+    # CJK text has no spaces, so CJK characters never act as word boundaries.
+    return char.isalnum() and not _CJK.match(char)
+
+
+class AhoCorasick:
+    """
+    Case-insensitive multi-pattern matcher with whole-word matching.
+
+    Example:
+        automaton = AhoCorasick()
+        automaton.add("machine learning", 1)
+        automaton.add("learning", 2)
+        automaton.build()
+        automaton.find("Deep machine learning")   # [(5, 21, 1)] (longest, leftmost)
+        automaton.find("İİİİ machine learning")   # [(5, 21, 1)]: offsets index the original text
+    """
+
+    def __init__(self):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, object]]] = [[]]  # (pattern length, value)
+        self._built = False
+
+    def __len__(self):
+        return sum(len(out) for out in self._out)
+
+    def add(self, pattern: str, value):
+        pattern = fold_case(pattern)
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), value))
+        self._built = False
+
+    def build(self):
+        """Compute failure links breadth-first; outputs are merged along them."""
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+
+    def iter_matches(self, text: str):
+        """Yield every whole-word (start, end, value) match, in one pass over `text`."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, char in enumerate(fold_case(text), start=1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in out[state]:
+                start = end - length
+                if start > 0 and _is_word_char(text[start]) and _is_word_char(text[start - 1]):
+                    continue
+                if end < len(text) and _is_word_char(text[end - 1]) and _is_word_char(text[end]):
+                    continue
+                yield start, end, value
+
+    def find(self, text: str) -> list[tuple[int, int, object]]:
+        """Leftmost-longest, non-overlapping matches."""
+        matches = sorted(self.iter_matches(text), key=lambda m: (m[0], m[0] - m[1]))
+        chosen, last_end = [], 0
+        for start, end, value in matches:
+            if start >= last_end:
+                chosen.append((start, end, value))
+                last_end = end
+        return chosen
+
+
+class TermIssue(NamedTuple):
+    start: int
+    end: int
+    term: str
+    expected: tuple[str, ...]  # approved translations, any of which satisfies the check
+    entry_id: int
+
+
+class TermChecker:
+    """
+    Check segment pairs against a glossary for one language pair.
+
+    Example:
+        checker = TermChecker(glossary, "en", "fr")
+        checker.check("Machine learning is fun.", "L'IA est amusante.")
+        # [TermIssue(0, 16, "Machine learning", ("Apprentissage automatique",), 1)]
+    """
+
+    def __init__(self, glossary: Glossary, src_lang: str, tgt_lang: str):
+        self.glossary = glossary
+        self.src_lang = src_lang.lower()
+        self.tgt_lang = tgt_lang.lower()
+        forms = {self.src_lang: {}, self.tgt_lang: {}}
+        for entry_id, lang, text in glossary.iter_forms():
+            if lang in forms:
+                forms[lang].setdefault(entry_id, []).append(text)
+
+        # Only entries with an approved translation can be enforced.
+        self.expected = {entry_id: tuple(texts) for entry_id, texts in forms[self.tgt_lang].items()}
+        self._source = AhoCorasick()
+        for entry_id, texts in forms[self.src_lang].items():
+            if entry_id in self.expected:
+                for text in texts:
+                    self._source.add(text, entry_id)
+        self._target = AhoCorasick()
+        for entry_id, texts in self.expected.items():
+            for text in texts:
+                self._target.add(text, entry_id)
+        self._source.build()
+        self._target.build()
+
+    @property
+    def term_count(self) -> int:
+        return len(self.expected)
+
+    def check(self, source: str, target: str) -> list[TermIssue]:
+        """Source terms whose approved translation is missing from `target`."""
+        found = self._source.find(source)
+        if not found:
+            return []
+        present = {entry_id for _, _, entry_id in self._target.iter_matches(target)}
+        return [
+            TermIssue(start, end, source[start:end], self.expected[entry_id], entry_id)
+            for start, end, entry_id in found
+            if entry_id not in present
+        ]
+
+    def check_pairs(self, pairs):
+        """Yield (index, source, target, issues) for each (source, target) pair with issues."""
+        for i, (source, target) in enumerate(pairs):
+            issues = self.check(source, target)
+            if issues:
+                yield i, source, target, issues
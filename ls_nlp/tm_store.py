@@ -0,0 +1,274 @@
+# tm_store.py
+# Compact in-memory translation memory.
+# All segment text lives in one UTF-8 buffer addressed by an array of offsets;
+# language codes are interned to small ints. Per segment the overhead is ~10
+# bytes instead of a Python str object and tuple.
+import re
+from array import array
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+
+from ls_nlp.distance import char_bag_bound, levenshtein, max_distance_for, similarity
+from ls_nlp.parallel_io import iter_tm_units
+
+
+def normalize_lang(code: str) -> str:
+    """Language codes are compared lowercased, with "-" separators (en_US -> en-us)."""
+    return code.strip().lower().replace("_", "-")
+
+
+class TMUnit(NamedTuple):
+    id: int
+    source: str
+    target: str
+    src_lang: str
+    tgt_lang: str
+
+
+class CompactTM:
+    """
+    Append-only translation memory.
+
+    Example:
+        tm = CompactTM()
+        tm.add("Bonjour", "Hello", "fr", "en")
+        tm.unit(0)            # TMUnit(0, "Bonjour", "Hello", "fr", "en")
+        list(tm.pairs("fr", "en"))
+    """
+
+    def __init__(self):
+        self._text = bytearray()
+        self._offsets = array("Q", [0])   # segment k = _text[_offsets[k]:_offsets[k + 1]]
+        self._seg_lang = array("H")       # interned language id per segment
+        self._unit_src = array("I")       # source segment index per unit
+        self._unit_tgt = array("I")       # target segment index per unit
+        self._langs: list[str] = []
+        self._lang_ids: dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._unit_src)
+
+    def __iter__(self):
+        return (self.unit(i) for i in range(len(self)))
+
+    def _lang_id(self, code: str) -> int:
+        code = normalize_lang(code)
+        lang_id = self._lang_ids.get(code)
+        if lang_id is None:
+            lang_id = self._lang_ids[code] = len(self._langs)
+            self._langs.append(code)
+        return lang_id
+
+    def _add_segment(self, text: str, lang: str) -> int:
+        self._text += text.encode("utf-8")
+        self._offsets.append(len(self._text))
+        self._seg_lang.append(self._lang_id(lang))
+        return len(self._seg_lang) - 1
+
+    def segment(self, k: int) -> str:
+        return self._text[self._offsets[k]:self._offsets[k + 1]].decode("utf-8")
+
+    def add(self, source: str, target: str, src_lang: str, tgt_lang: str) -> int:
+        self._unit_src.append(self._add_segment(source, src_lang))
+        self._unit_tgt.append(self._add_segment(target, tgt_lang))
+        return len(self._unit_src) - 1
+
+    def add_segments(self, segments: dict, src_lang: str | None = None) -> int:
+        """
+        Add one parsed unit ({language: text}). The source is `src_lang` when present,
+        otherwise the first language; one TM unit is stored per target language.
+        Returns the number of units added.
+        """
+        langs = list(segments)
+        src = next((l for l in langs if src_lang and normalize_lang(l) == normalize_lang(src_lang)), langs[0])
+        targets = [l for l in langs if l != src]
+        if not targets:
+            return 0
+        src_index = self._add_segment(segments[src], src)
+        for lang in targets:
+            self._unit_src.append(src_index)
+            self._unit_tgt.append(self._add_segment(segments[lang], lang))
+        return len(targets)
+
+    def source(self, i: int) -> str:
+        return self.segment(self._unit_src[i])
+
+    def unit(self, i: int) -> TMUnit:
+        s, t = self._unit_src[i], self._unit_tgt[i]
+        return TMUnit(
+            i, self.segment(s), self.segment(t),
+            self._langs[self._seg_lang[s]], self._langs[self._seg_lang[t]],
+        )
+
+    def pairs(self, src_lang: str | None = None, tgt_lang: str | None = None):
+        """Yield (source, target) for units matching the (optional) language pair."""
+        src_id = self._lang_ids.get(normalize_lang(src_lang)) if src_lang else None
+        tgt_id = self._lang_ids.get(normalize_lang(tgt_lang)) if tgt_lang else None
+        if (src_lang and src_id is None) or (tgt_lang and tgt_id is None):
+            return
+        for s, t in zip(self._unit_src, self._unit_tgt):
+            if src_id is not None and self._seg_lang[s] != src_id:
+                continue
+            if tgt_id is not None and self._seg_lang[t] != tgt_id:
+                continue
+            yield self.segment(s), self.segment(t)
+
+    def languages(self) -> list[str]:
+        return list(self._langs)
+
+    def language_pairs(self) -> dict[tuple[str, str], int]:
+        counts = {}
+        for s, t in zip(self._unit_src, self._unit_tgt):
+            key = (self._langs[self._seg_lang[s]], self._langs[self._seg_lang[t]])
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the store's buffers."""
+        arrays = (self._offsets, self._seg_lang, self._unit_src, self._unit_tgt)
+        return len(self._text) + sum(a.itemsize * len(a) for a in arrays)
+
+    def load(self, source, fmt: str = "tmx", src_lang: str | None = None, on_progress=None, every: int = 10_000) -> int:
+        """
+        Stream units from a TMX/XLIFF file object into the store.
+        `on_progress(units)` is called every `every` parsed units. Returns units added.
+        """
+        added = parsed = 0
+        for segments in iter_tm_units(source, fmt):
+            added += self.add_segments(segments, src_lang)
+            parsed += 1
+            if on_progress and parsed % every == 0:
+                on_progress(added)
+        return added
+
+
+# -------------------------------------------------
+# Fuzzy lookup
+# -------------------------------------------------
+
+# Letter/digit runs: "_" separates words, as in SQLite's unicode61 tokenizer (AssetStore FTS).
+_WORD = re.compile(r"[^\W_]+")
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def index_terms(text: str) -> set[str]:
+    """Lowercased words; CJK runs (no spaces) are split into character bigrams."""
+    terms = set()
+    for word in _WORD.findall(text.casefold()):
+        if _CJK.search(word) and len(word) > 1:
+            terms.update(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            terms.add(word)
+    return terms
+
+
+def normalize_segment(text: str) -> str:
+    return " ".join(text.split())
+
+
+class TMMatch(NamedTuple):
+    unit_id: int
+    source: str
+    target: str
+    src_lang: str
+    tgt_lang: str
+    score: int  # match percentage
+
+
+class FuzzyTM:
+    """
+    Fuzzy-match lookup over a CompactTM.
+    An inverted index (term -> array of unit ids) and a source-length filter
+    shortlist candidates; a character-count lower bound rejects most of them,
+    so only a few get a full (banded) Levenshtein computation, with a cutoff
+    that tightens as better matches are found.
+
+    Example:
+        fuzzy = FuzzyTM(tm)
+        fuzzy.lookup("Le contrat a été signé.", k=3, min_score=70)
+    """
+
+    def __init__(self, tm: CompactTM, max_df: float = 0.05):
+        self.tm = tm
+        self.max_df = max_df
+        self._postings: dict[str, array] = {}
+        self._lengths = array("I")  # normalized source length per unit
+        self.indexed = 0
+        self.update()
+
+    def update(self, on_progress=None, every: int = 50_000) -> int:
+        """Index units added to the TM since the last call. Returns units indexed."""
+        start = self.indexed
+        for i in range(start, len(self.tm)):
+            source = self.tm.source(i)
+            self._lengths.append(len(normalize_segment(source)))
+            for term in index_terms(source):
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = array("I")
+                posting.append(i)
+            if on_progress and (i + 1) % every == 0:
+                on_progress(i + 1 - start)
+        self.indexed = len(self.tm)
+        return self.indexed - start
+
+    def _candidates(self, terms: set[str], length: int, min_score: int, max_candidates: int) -> np.ndarray:
+        postings = [self._postings[t] for t in terms if t in self._postings]
+        if not postings:
+            return np.zeros(0, dtype=np.int64)
+        # Very common terms only add noise when rarer ones are present.
+        limit = max(1, int(self.max_df * self.indexed))
+        rare = [p for p in postings if len(p) <= limit]
+        ids = np.concatenate([np.frombuffer(p, dtype=np.uint32) for p in (rare or postings)])
+        shared = np.bincount(ids, minlength=self.indexed)
+        candidates = np.flatnonzero(shared)
+
+        # A match >= min_score% cannot differ in length by more than (1 - min_score%) of the longer text.
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)[candidates].astype(np.int64)
+        longest = np.maximum(lengths, length)
+        candidates = candidates[np.abs(lengths - length) <= (1 - min_score / 100) * longest]
+        order = np.argsort(-shared[candidates], kind="stable")
+        return candidates[order[:max_candidates]]
+
+    def lookup(self, query: str, k: int = 5, min_score: int = 70, src_lang: str | None = None,
+               tgt_lang: str | None = None, max_candidates: int = 30) -> list[TMMatch]:
+        """Top-k units whose source matches `query` at >= min_score percent (edit distance)."""
+        query = normalize_segment(query)
+        if not query or not self.indexed:
+            return []
+        ids = self._candidates(index_terms(query), len(query), min_score, max_candidates).tolist()
+        return rank_matches(query, (self.tm.unit(i) for i in ids), k, min_score, src_lang, tgt_lang)
+
+
+def rank_matches(query: str, units, k: int = 5, min_score: int = 70, src_lang: str | None = None,
+                 tgt_lang: str | None = None) -> list[TMMatch]:
+    """
+    Score candidate TMUnits against `query` and keep the top k at >= min_score.
+    A character-count lower bound rejects most candidates before the (banded)
+    Levenshtein computation, whose cutoff tightens as better matches are found.
+    """
+    query = normalize_segment(query)
+    src_lang = normalize_lang(src_lang) if src_lang else None
+    tgt_lang = normalize_lang(tgt_lang) if tgt_lang else None
+    best: list[tuple[int, TMUnit]] = []  # (score, unit), best first
+    query_chars = Counter(query)
+    for unit in units:
+        if (src_lang and unit.src_lang != src_lang) or (tgt_lang and unit.tgt_lang != tgt_lang):
+            continue
+        floor = best[-1][0] if len(best) >= k else min_score
+        source = normalize_segment(unit.source)
+        cutoff = max_distance_for(floor / 100, max(len(query), len(source)))
+        if char_bag_bound(query_chars, source) > cutoff:
+            continue
+        distance = levenshtein(query, source, cutoff)
+        if distance > cutoff:
+            continue
+        score = int(similarity(query, source, distance) * 100)
+        if score < floor:
+            continue
+        best.append((score, unit))
+        best.sort(key=lambda item: (-item[0], item[1].id))
+        del best[k:]
+    return [TMMatch(*unit, score) for score, unit in best]
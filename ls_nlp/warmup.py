@@ -0,0 +1,71 @@
+# warmup.py
+# Background warm-up of expensive resources at process start.
+# Pages poll the readiness state instead of paying the load inside a request.
+import threading
+import time
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class Warmup:
+    def __init__(self, name: str, task):
+        self.name = name
+        self.task = task
+        self.status = PENDING
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.status = LOADING
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name=f"ls-warmup-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self.task()
+            self.status = READY
+        except Exception as exc:  # surfaced to pages; they fall back to loading on first use
+            self.error = exc
+            self.status = FAILED
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    def ready(self) -> bool:
+        return self.status == READY
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return round((self.finished_at or time.time()) - self.started_at, 1)
+
+
+_WARMUPS: dict[str, Warmup] = {}
+_LOCK = threading.Lock()
+
+
+def start_warmup(name: str, task) -> Warmup:
+    """Start `task` in a daemon thread once per process; later calls return the same handle."""
+    with _LOCK:
+        warmup = _WARMUPS.get(name)
+        if warmup is None:
+            warmup = _WARMUPS[name] = Warmup(name, task)
+            warmup.start()
+        return warmup
+
+
+def get_warmup(name: str) -> Warmup | None:
+    return _WARMUPS.get(name)
+
+
+def warmup_status(name: str) -> str | None:
+    """Status string, or None if no warm-up was started in this process."""
+    warmup = _WARMUPS.get(name)
+    return warmup.status if warmup else None
@@ -0,0 +1,319 @@
+# work_queue.py
+# SQLite-backed annotation work queue.
+# Uploads are parsed incrementally into tasks and inserted in batches by a
+# background thread; reviewers lease tasks for a limited time, so several of
+# them (in any session or process) can work the same queue concurrently.
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from ls_nlp.bulk import is_json_array, iter_chunks, iter_json_array, iter_records, read_progress
+
+PENDING, LEASED, DONE = "pending", "leased", "done"
+INGESTING, READY, FAILED = "ingesting", "ready", "failed"
+MAX_TASK_CHARS = 2000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    tasks INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    batch_id INTEGER NOT NULL REFERENCES batches(id),
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL NOT NULL DEFAULT 0,
+    result TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_open ON tasks(lease_expires, id) WHERE status != 'done';
+CREATE INDEX IF NOT EXISTS idx_tasks_batch ON tasks(batch_id, status);
+"""
+
+
+# ---- parsing ----
+
+def split_text(text: str, max_chars: int = MAX_TASK_CHARS) -> list[str]:
+    """Split `text` into pieces of at most `max_chars`, at the last space before the limit when there is one."""
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind(" ", 0, max_chars + 1)
+        cut = cut if cut > 0 else max_chars
+        pieces.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def iter_tasks(binary, fmt: str, text_field: str = "text", max_chars: int = MAX_TASK_CHARS):
+    """
+    Yield one task payload (dict) per annotation unit of an upload:
+    - txt: each non-empty line, long lines split into `max_chars` pieces;
+    - jsonl / json: each object of a JSON Lines file or of a top-level JSON array.
+    """
+    if fmt == "txt":
+        for record in iter_records(binary, "txt"):
+            for piece in split_text(record["text"], max_chars):
+                yield {text_field: piece}
+    elif is_json_array(binary):
+        stream = io.TextIOWrapper(binary, encoding="utf-8-sig")
+        try:
+            for item in iter_json_array(stream):
+                yield item if isinstance(item, dict) else {text_field: item}
+        finally:
+            stream.detach()
+    else:
+        yield from iter_records(binary, "jsonl")
+
+
+def task_text(payload: dict, text_field: str = "text") -> str:
+    """Text to show a reviewer: `text_field`, else the first string value, else the JSON."""
+    value = payload.get(text_field)
+    if isinstance(value, str):
+        return value
+    value = next((v for v in payload.values() if isinstance(v, str)), None)
+    return value if value is not None else json.dumps(payload, ensure_ascii=False)
+
+
+# ---- queue ----
+
+class Task(NamedTuple):
+    id: int
+    batch_id: int
+    payload: dict
+    lease_expires: float
+
+
+class WorkQueue:
+    """
+    Annotation tasks grouped in upload batches.
+
+    Example:
+        queue = WorkQueue("./.cache/work_queue.db")
+        batch_id = queue.create_batch("batch.jsonl")
+        queue.add_tasks(batch_id, [{"text": "..."}, ...])
+        tasks = queue.lease("alice", n=5, ttl=600)     # nobody else gets these for 10 min
+        queue.complete("alice", tasks[0].id, {"label": "ok"})
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE takes the database write lock up front, so a read-then-update
+        (such as picking tasks to lease) cannot interleave with another process."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    def _query(self, sql: str, params=()) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ---- batches ----
+
+    def create_batch(self, name: str) -> int:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO batches (name, status, created) VALUES (?, ?, ?)", (name, INGESTING, time.time())
+            )
+            return cursor.lastrowid
+
+    def add_tasks(self, batch_id: int, payloads, chunk_size: int = 1000, on_chunk=None) -> int:
+        """Insert task payloads with one executemany (and transaction) per `chunk_size`. Returns tasks added."""
+        added = 0
+        for chunk in iter_chunks(payloads, chunk_size):
+            rows = [(batch_id, json.dumps(p, ensure_ascii=False)) for p in chunk]
+            with self._transaction() as conn:
+                conn.executemany("INSERT INTO tasks (batch_id, payload) VALUES (?, ?)", rows)
+                conn.execute("UPDATE batches SET tasks = tasks + ? WHERE id = ?", (len(rows), batch_id))
+            added += len(rows)
+            if on_chunk:
+                on_chunk(added)
+        return added
+
+    def finish_batch(self, batch_id: int, error: str | None = None):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE batches SET status = ?, error = ?, finished = ? WHERE id = ?",
+                (FAILED if error else READY, error, time.time(), batch_id),
+            )
+
+    def batches(self, limit: int = 20) -> list[dict]:
+        rows = self._query(
+            "SELECT id, name, status, tasks, error, created, finished FROM batches ORDER BY id DESC LIMIT ?", (limit,)
+        )
+        keys = ("id", "name", "status", "tasks", "error", "created", "finished")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def stats(self, batch_id: int | None = None) -> dict:
+        """Task counts per status; leases past their expiry count as pending."""
+        where, params = ("WHERE batch_id = ?", [batch_id]) if batch_id is not None else ("", [])
+        rows = self._query(
+            "SELECT CASE WHEN status = 'leased' AND lease_expires < ? THEN 'pending' ELSE status END, COUNT(*)"
+            f" FROM tasks {where} GROUP BY 1",
+            [time.time(), *params],
+        )
+        counts = {PENDING: 0, LEASED: 0, DONE: 0}
+        counts.update(dict(rows))
+        return counts
+
+    # ---- reviewing ----
+
+    def lease(self, worker: str, n: int = 1, ttl: float = 600, batch_id: int | None = None) -> list[Task]:
+        """
+        Claim up to `n` tasks that are pending or whose lease expired, for `ttl`
+        seconds. Selection and update run in one write transaction, so concurrent
+        reviewers never receive the same task.
+        """
+        now = time.time()
+        where, params = "status != 'done' AND lease_expires < ?", [now]
+        if batch_id is not None:
+            where += " AND batch_id = ?"
+            params.append(batch_id)
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"SELECT id, batch_id, payload FROM tasks WHERE {where} ORDER BY lease_expires, id LIMIT ?",
+                [*params, n],
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, updated = ? WHERE id = ?",
+                [(LEASED, worker, now + ttl, now, task_id) for task_id, _, _ in rows],
+            )
+        return [Task(task_id, batch, json.loads(payload), now + ttl) for task_id, batch, payload in rows]
+
+    def complete(self, worker: str, task_id: int, result) -> bool:
+        """Store the result of a task still leased by `worker`; False if the lease was lost."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, updated = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, json.dumps(result, ensure_ascii=False), time.time(), task_id, LEASED, worker),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, worker: str, task_ids) -> int:
+        """Hand leased tasks back to the queue. Returns the number released."""
+        with self._transaction() as conn:
+            cursor = conn.executemany(
+                "UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = 0, updated = ?"
+                " WHERE id = ? AND status = ? AND lease_owner = ?",
+                [(PENDING, time.time(), task_id, LEASED, worker) for task_id in task_ids],
+            )
+            return cursor.rowcount
+
+    def iter_results(self, batch_id: int):
+        """Yield {"id", "task", "result"} for the completed tasks of a batch, in upload order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, result FROM tasks WHERE batch_id = ? AND status = 'done' ORDER BY id", (batch_id,)
+            ).fetchall()
+        for task_id, payload, result in rows:
+            yield {"id": task_id, "task": json.loads(payload), "result": json.loads(result)}
+
+
+# ---- background ingestion ----
+
+class Ingestion:
+    """
+    Parse an upload into tasks on a daemon thread; pages poll `tasks`,
+    `fraction` and `status` instead of blocking a rerun on the whole file.
+    """
+
+    def __init__(self, work_queue: WorkQueue, binary, name: str, fmt: str, chunk_size: int = 1000):
+        self.queue = work_queue
+        self.binary = binary
+        self.name = name
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.size = getattr(binary, "size", 0) or len(binary.getbuffer())
+        self.batch_id = work_queue.create_batch(name)
+        self.status = INGESTING
+        self.tasks = 0
+        self.fraction = 0.0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name=f"ls-ingest-{self.batch_id}", daemon=True)
+        self._thread.start()
+
+    def _on_chunk(self, added: int):
+        self.tasks = added
+        self.fraction = read_progress(self.binary, self.size)
+
+    def _run(self):
+        error = None
+        try:
+            self.queue.add_tasks(
+                self.batch_id, iter_tasks(self.binary, self.fmt), chunk_size=self.chunk_size, on_chunk=self._on_chunk
+            )
+        except Exception as exc:  # malformed upload; reported on the batch
+            error = f"{type(exc).__name__}: {exc}"
+        self.queue.finish_batch(self.batch_id, error)
+        self.binary = None  # the upload can be hundreds of MB; keep only the counters
+        self.error = error
+        self.fraction = 1.0
+        self.finished_at = time.time()
+        self.status = FAILED if error else READY
+
+    def wait(self, timeout: float | None = None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return round((self.finished_at or time.time()) - self.started_at, 1)
+
+
+_INGESTIONS: dict[int, Ingestion] = {}
+
+
+def start_ingestion(work_queue: WorkQueue, binary, name: str, fmt: str, chunk_size: int = 1000) -> Ingestion:
+    """Create a batch and ingest `binary` into it in the background. Returns the (process-wide) handle."""
+    ingestion = Ingestion(work_queue, binary, name, fmt, chunk_size)
+    _INGESTIONS[ingestion.batch_id] = ingestion
+    ingestion.start()
+    return ingestion
+
+
+def get_ingestion(batch_id: int) -> Ingestion | None:
+    return _INGESTIONS.get(batch_id)
+
+
+def pop_ingestion(batch_id: int) -> Ingestion | None:
+    """Forget a finished ingestion once its outcome has been reported."""
+    ingestion = _INGESTIONS.get(batch_id)
+    if ingestion is not None and ingestion.status != INGESTING:
+        del _INGESTIONS[batch_id]
+    return ingestion
@@ -0,0 +1,54 @@
+# workers.py
+# Shared process pool for CPU-bound batch jobs, and an order-preserving map
+# that keeps only a bounded number of chunks in flight.
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def can_parallelize() -> bool:
+    return (os.cpu_count() or 1) > 1
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Process-wide pool; spawn keeps workers independent of the server's threads."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=default_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def imap_bounded(fn, chunks, parallel: bool = True, max_pending: int | None = None):
+    """
+    Yield fn(chunk) for each chunk, in input order.
+    Unlike Executor.map, the input is consumed lazily: at most `max_pending`
+    chunks are submitted ahead, so memory stays bounded on huge inputs.
+    `fn` must be a module-level function when running in the pool.
+    """
+    if not parallel or not can_parallelize():
+        for chunk in chunks:
+            yield fn(chunk)
+        return
+
+    pool = get_pool()
+    max_pending = max_pending or 2 * default_workers()
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.submit(fn, chunk))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -7,3 +7,11 @@ SECRET_KEY = os.getenv("LS_SECRET_KEY", "default_secret_key")
 DATABASE_URL = os.getenv("LS_DATABASE_URL", "sqlite:///./local.db") 
 API_BASE_URL = os.getenv("LS_API_BASE_URL", "http://localhost:8000")    
 REDIS_URL = os.getenv("LS_REDIS_URL", "redis://localhost:6379/0")
+INFERENCE_CACHE_PATH = os.getenv("LS_INFERENCE_CACHE_PATH", "./.cache/inference.db")
+INFERENCE_CACHE_MAX_ENTRIES = int(os.getenv("LS_INFERENCE_CACHE_MAX_ENTRIES", "50000"))
+SENTIMENT_BACKEND = os.getenv("LS_SENTIMENT_BACKEND", "torch")  # torch | int8
+MODEL_CACHE_DIR = os.getenv("LS_MODEL_CACHE_DIR", "./.cache/models")
+JIEBA_CACHE_DIR = os.getenv("LS_JIEBA_CACHE_DIR", "./.cache/jieba")
+DEDUP_WORK_DIR = os.getenv("LS_DEDUP_WORK_DIR", "./.cache/dedup")
+WORK_QUEUE_PATH = os.getenv("LS_WORK_QUEUE_PATH", "./.cache/work_queue.db")
+WARMUP_MODELS = os.getenv("LS_WARMUP_MODELS", "true").lower() == "true"
@@ -1,5 +1,236 @@
 # 1_Asset_Quality_Mgmt.py
+import time
 import streamlit as st
+import pandas as pd
+
+from utils import make_key, load_asset_store
+from ls_ui.env import WORK_QUEUE_PATH
+from ls_nlp.asset_store import AssetStore
+from ls_nlp.bulk import read_progress, upload_format
+from ls_nlp.glossary import Glossary
+from ls_nlp.parallel_io import tm_format
+from ls_nlp.terminology import TermChecker
+from ls_nlp.tm_store import CompactTM, FuzzyTM
+from ls_nlp.work_queue import INGESTING, WorkQueue, get_ingestion, pop_ingestion, start_ingestion, task_text
+
+
+# -------------------------------------------------
+# Helper Functions
+# -------------------------------------------------
+
+# Seed termbase and TM, written to an empty asset store
+glossary_db = {
+    "API": {"FR": "Interface de programmation", "ZH": "应用程序接口"},
+    "Machine Learning": {"FR": "Apprentissage automatique", "ZH": "机器学习"},
+}
+SAMPLE_TM = [
+    ("Le contrat a été signé hier.", "The contract was signed yesterday."),
+    ("La livraison est prévue demain.", "Delivery is scheduled for tomorrow."),
+    ("Le contrat a été annulé hier.", "The contract was cancelled yesterday."),
+    ("Veuillez signer le contrat avant vendredi.", "Please sign the contract before Friday."),
+    ("La facture a été envoyée au client.", "The invoice was sent to the customer."),
+    ("Bonjour. Comment ça va?", "Hello. How are you?"),
+]
+STORE_NAME = "Asset store"
+
+@st.cache_resource(show_spinner=False)
+def get_asset_store() -> AssetStore:
+    """The shared asset store, seeded with the samples the first time it is empty."""
+    store = load_asset_store()
+    if not store.glossary_count():
+        seed = Glossary()
+        for term, translations in glossary_db.items():
+            seed.add(term, translations)
+        store.add_glossary(seed)
+    if not store.tm_count():
+        store.add_tm_units(((src, tgt, "fr", "en") for src, tgt in SAMPLE_TM), origin="sample")
+    return store
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def load_store_glossary(_store: AssetStore, revision: tuple) -> Glossary:
+    """In-memory search index over the stored termbase, rebuilt when the store changes."""
+    return _store.load_glossary()
+
+def get_glossary() -> Glossary:
+    """Per-session termbase: the asset store's until a file is loaded."""
+    if "glossary" not in st.session_state:
+        store = get_asset_store()
+        st.session_state["glossary"] = {"name": STORE_NAME, "store": load_store_glossary(store, store.glossary_revision())}
+    return st.session_state["glossary"]["store"]
+
+def render_glossary_results(glossary: Glossary, matches):
+    langs = glossary.languages
+    rows = []
+    for match in matches:
+        entry = glossary.entry(match.entry_id)
+        row = {lang.upper(): entry.term if lang == entry.lang else entry.translations.get(lang, "") for lang in langs}
+        row.update({"Matched": f"{match.form} ({match.lang})", "Match": match.kind, "Score": match.score})
+        rows.append(row)
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+def import_tm(uploaded, src_lang: str | None, on_progress=None) -> CompactTM:
+    """Stream a TMX/XLIFF upload into a CompactTM without building the whole XML tree."""
+    tm = CompactTM()
+    uploaded.seek(0)
+    tm.load(
+        uploaded,
+        tm_format(uploaded.name),
+        src_lang=src_lang or None,
+        on_progress=lambda units: on_progress and on_progress(units, read_progress(uploaded, uploaded.size)),
+    )
+    return tm
+
+def get_fuzzy_tm() -> tuple[FuzzyTM | AssetStore, str, int]:
+    """
+    Fuzzy index over the imported TM (built once per import), else the asset
+    store, which is queried in SQLite. Returns (index, name, units).
+    """
+    state = st.session_state.get("tm")
+    if not state:
+        store = get_asset_store()
+        return store, STORE_NAME, store.tm_count()
+    if "fuzzy" not in state:
+        with st.spinner("Indexing translation memory…"):
+            state["fuzzy"] = FuzzyTM(state["store"])
+    return state["fuzzy"], state["name"], state["fuzzy"].indexed
+
+def render_tm_matches(matches):
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {"Match %": m.score, "Source": m.source, "Target": m.target, "Languages": f"{m.src_lang} → {m.tgt_lang}"}
+                for m in matches
+            ]
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+def render_tm_summary(tm: CompactTM, preview_rows: int = 20):
+    cols = st.columns(3)
+    cols[0].metric("Units", f"{len(tm):,}")
+    cols[1].metric("Languages", len(tm.languages()))
+    cols[2].metric("Memory", f"{tm.nbytes() / 1024:,.0f} KB")
+    st.caption(
+        "Language pairs: "
+        + ", ".join(f"{s} → {t} ({n:,})" for (s, t), n in tm.language_pairs().items())
+    )
+    preview = [tm.unit(i) for i in range(min(preview_rows, len(tm)))]
+    st.dataframe(
+        pd.DataFrame(preview, columns=["id", "source", "target", "src_lang", "tgt_lang"]),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+def get_term_checker(glossary: Glossary, src_lang: str, tgt_lang: str) -> TermChecker:
+    """
+    Per-session automaton, rebuilt when the termbase or the language pair changes.
+    The checker holds a reference to its glossary, so the object id stays unique while cached.
+    """
+    key = (id(glossary), len(glossary), src_lang, tgt_lang)
+    cached = st.session_state.get("term_checker")
+    if cached is None or cached["key"] != key:
+        cached = st.session_state["term_checker"] = {"key": key, "checker": TermChecker(glossary, src_lang, tgt_lang)}
+    return cached["checker"]
+
+def default_index(options: list[str], lang: str | None, fallback: int = 0) -> int:
+    """Position of `lang` (or its primary subtag, e.g. fr for fr-ca) in `options`."""
+    primary = (lang or "").lower().split("-")[0]
+    return options.index(primary) if primary in options else min(fallback, len(options) - 1)
+
+def render_term_issues(results, limit: int = 200):
+    rows = [
+        {
+            "Pair #": i + 1,
+            "Source term": issue.term,
+            "Expected": " / ".join(issue.expected),
+            "Source": source,
+            "Target": target,
+        }
+        for i, source, target, issues in results
+        for issue in issues
+    ]
+    st.dataframe(pd.DataFrame(rows[:limit]), use_container_width=True, hide_index=True)
+    if len(rows) > limit:
+        st.caption(f"Showing the first {limit} of {len(rows):,} issues.")
+
+# Annotation queue
+REVIEW_LABELS = ["Approved", "Needs edit", "Rejected"]
+LEASE_SIZE = 5
+LEASE_TTL = 15 * 60  # seconds a reviewer keeps leased tasks
+
+@st.cache_resource(show_spinner=False)
+def get_work_queue() -> WorkQueue:
+    return WorkQueue(WORK_QUEUE_PATH)
+
+@st.fragment(run_every=1.0)
+def render_ingestion(batch_id: int):
+    """Poll a background ingestion; the rest of the page stays interactive meanwhile."""
+    ingestion = get_ingestion(batch_id)
+    if ingestion is None:  # reported already, or the server restarted
+        st.session_state.pop("ingest_batch", None)
+        return
+    if ingestion.status == INGESTING:
+        st.progress(ingestion.fraction, text=f"Queued {ingestion.tasks:,} tasks from {ingestion.name}…")
+        return
+    if ingestion.error:
+        flash = ("error", f"{ingestion.name}: stopped after {ingestion.tasks:,} tasks ({ingestion.error})")
+    else:
+        flash = ("success", f"{ingestion.name}: queued {ingestion.tasks:,} tasks in {ingestion.elapsed()}s")
+    st.session_state["annotation_flash"] = flash
+    st.session_state.pop("ingest_batch", None)
+    pop_ingestion(batch_id)
+    st.rerun()
+
+def render_flash():
+    """Show (once) the outcome stored before the last full rerun."""
+    kind, message = st.session_state.pop("annotation_flash", (None, None))
+    if kind:
+        getattr(st, kind)(message)
+
+# Review callbacks run before the rerun, so the queue counts below are current
+def lease_reviews(work_queue: WorkQueue, reviewer: str):
+    tasks = work_queue.lease(reviewer, n=LEASE_SIZE, ttl=LEASE_TTL)
+    if tasks:
+        st.session_state["review"] = {"reviewer": reviewer, "tasks": tasks}
+    else:
+        st.session_state["annotation_flash"] = ("info", "No pending tasks.")
+
+def release_reviews(work_queue: WorkQueue):
+    review = st.session_state.pop("review")
+    released = work_queue.release(review["reviewer"], [task.id for task in review["tasks"]])
+    st.session_state["annotation_flash"] = ("info", f"Returned {released} task(s) to the queue.")
+
+def submit_reviews(work_queue: WorkQueue):
+    review = st.session_state.pop("review")
+    saved = 0
+    for task in review["tasks"]:
+        answer = {
+            "label": st.session_state.get(f"review_label_{task.id}"),
+            "note": st.session_state.get(f"review_note_{task.id}", ""),
+            "reviewer": review["reviewer"],
+        }
+        saved += work_queue.complete(review["reviewer"], task.id, answer)
+    lost = len(review["tasks"]) - saved
+    st.session_state["annotation_flash"] = (
+        ("warning", f"Saved {saved} review(s); {lost} lease(s) had expired and were reassigned.")
+        if lost else ("success", f"Saved {saved} review(s).")
+    )
+
+def render_queue_summary(work_queue: WorkQueue):
+    counts = work_queue.stats()
+    cols = st.columns(3)
+    cols[0].metric("Pending", f"{counts['pending']:,}")
+    cols[1].metric("In review", f"{counts['leased']:,}")
+    cols[2].metric("Done", f"{counts['done']:,}")
+    batches = work_queue.batches(limit=10)
+    if batches:
+        st.dataframe(
+            pd.DataFrame(batches, columns=["id", "name", "status", "tasks", "error"]),
+            use_container_width=True,
+            hide_index=True,
+        )
+
 
 st.title("📚 Asset & Quality Management")
 
@@ -12,18 +243,253 @@ st.markdown("""
 """)
 
 # Interactive Glossary Search
-search_term = st.text_input("Search terminology", "API")
-glossary_db = {
-    "API": {"FR": "Interface de programmation", "ZH": "应用程序接口"},
-    "Machine Learning": {"FR": "Apprentissage automatique", "ZH": "机器学习"},
-}
+glossary = get_glossary()
+with st.expander("Load a termbase (CSV / TBX)"):
+    termbase = st.file_uploader(
+        "CSV with an `en` (or `term`) column plus one column per language, or TBX",
+        type=["csv", "tbx", "xml"],
+        key=make_key(0, "upl", "termbase")
+    )
+    if termbase and st.button("Load termbase", key=make_key(0, "btn", "termbase")):
+        loaded = Glossary()
+        with st.spinner("Indexing termbase…"):
+            added = loaded.load(termbase, termbase.name)
+        st.session_state["glossary"] = {"name": termbase.name, "store": loaded}
+        glossary = loaded
+        st.success(f"Indexed {added:,} entries")
+    if st.session_state["glossary"]["name"] != STORE_NAME:
+        st.caption(f"Searching {st.session_state['glossary']['name']} (this session only).")
+        if st.button("Save termbase to asset store", key=make_key(0, "btn", "termbase_save")):
+            store = get_asset_store()
+            with st.spinner("Saving termbase…"):
+                saved = store.add_glossary(glossary)
+            glossary = load_store_glossary(store, store.glossary_revision())
+            st.session_state["glossary"] = {"name": STORE_NAME, "store": glossary}
+            st.success(f"Saved {saved:,} entries; the asset store now holds {len(glossary):,}")
+
+cols = st.columns([0.7, 0.3])
+search_term = cols[0].text_input("Search terminology", "API", key=make_key(0, "txt", "glossary_search"))
+search_lang = cols[1].selectbox(
+    "Language", ["Any"] + [lang.upper() for lang in glossary.languages], key=make_key(0, "sel", "glossary_lang")
+)
 if search_term:
-    st.dataframe(glossary_db.get(search_term, {}), use_container_width=True)
+    started = time.perf_counter()
+    matches = glossary.search(search_term, limit=20, lang=None if search_lang == "Any" else search_lang.lower())
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.caption(
+        f"{len(matches)} result(s) in {elapsed_ms:.1f} ms · "
+        f"{st.session_state['glossary']['name']} ({len(glossary):,} entries)"
+    )
+    if matches:
+        render_glossary_results(glossary, matches)
+    else:
+        st.info("No matching terms.")
+
+# Translation Memory Import
+st.subheader("Import Translation Memory")
+tm_file = st.file_uploader(
+    "TMX or XLIFF file", type=["tmx", "xlf", "xliff"], key=make_key(0, "upl", "tm_import")
+)
+tm_src_lang = st.text_input(
+    "Source language (optional, defaults to the first language of each unit)",
+    key=make_key(0, "txt", "tm_src_lang"),
+)
+if tm_file and st.button("Import TM", key=make_key(0, "btn", "tm_import")):
+    bar = st.progress(0.0, text="Parsing…")
+    tm = import_tm(
+        tm_file,
+        tm_src_lang.strip(),
+        on_progress=lambda units, fraction: bar.progress(fraction, text=f"Loaded {units:,} units"),
+    )
+    bar.progress(1.0, text=f"Loaded {len(tm):,} units")
+    st.session_state["tm"] = {"name": tm_file.name, "store": tm}
+
+if st.session_state.get("tm"):
+    st.markdown(f"**Loaded:** {st.session_state['tm']['name']}")
+    render_tm_summary(st.session_state["tm"]["store"])
+    cols = st.columns(2)
+    if cols[0].button("Save to asset store", key=make_key(0, "btn", "tm_save")):
+        tm = st.session_state["tm"]["store"]
+        bar = st.progress(0.0, text="Saving…")
+        added = get_asset_store().add_tm_units(
+            ((u.source, u.target, u.src_lang, u.tgt_lang) for u in tm),
+            origin=st.session_state["tm"]["name"],
+            on_progress=lambda seen, added: bar.progress(seen / len(tm), text=f"Saved {seen:,} units"),
+        )
+        bar.progress(1.0, text=f"Saved {added:,} new units ({len(tm) - added:,} already stored)")
+    if cols[1].button("Clear TM", key=make_key(0, "btn", "tm_clear")):
+        st.session_state.pop("tm")
+        st.rerun()
+
+# Translation Memory Lookup
+st.subheader("Translation Memory Lookup")
+fuzzy_tm, tm_name, tm_units = get_fuzzy_tm()
+tm_query = st.text_area(
+    "Source segment",
+    "Le contrat a été signé avant-hier.",
+    height=80,
+    key=make_key(0, "txt", "tm_query")
+)
+cols = st.columns(2)
+tm_k = cols[0].slider("Matches", 1, 10, 5, key=make_key(0, "sld", "tm_k"))
+tm_min = cols[1].slider("Minimum match %", 50, 100, 70, step=5, key=make_key(0, "sld", "tm_min"))
+if tm_query.strip():
+    started = time.perf_counter()
+    tm_matches = fuzzy_tm.lookup(tm_query, k=tm_k, min_score=tm_min)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.caption(f"{len(tm_matches)} match(es) in {elapsed_ms:.1f} ms · {tm_name} ({tm_units:,} units)")
+    if tm_matches:
+        render_tm_matches(tm_matches)
+    else:
+        st.info(f"No TM match at {tm_min}% or above.")
+
+# Asset Store Search
+st.subheader("Search Saved Assets")
+store = get_asset_store()
+st.caption(
+    f"{STORE_NAME}: {store.tm_count():,} TM units · {store.glossary_count():,} glossary entries · "
+    "persisted in SQLite and shared by every session"
+)
+asset_query = st.text_input("Words to find in saved TM sources and glossary terms", key=make_key(0, "txt", "asset_search"))
+if asset_query.strip():
+    started = time.perf_counter()
+    entries = store.search_glossary(asset_query, limit=20)
+    units = store.search_tm(asset_query, limit=50)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.caption(f"{len(entries)} glossary entries and {len(units)} TM units in {elapsed_ms:.1f} ms")
+    if entries:
+        st.dataframe(
+            pd.DataFrame(
+                [{"Term": e.term, "Language": e.lang, **{l.upper(): t for l, t in e.translations.items()}} for e in entries]
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+    if units:
+        st.dataframe(
+            pd.DataFrame(units, columns=["id", "source", "target", "src_lang", "tgt_lang"]),
+            use_container_width=True,
+            hide_index=True,
+        )
+    if not entries and not units:
+        st.info("Nothing saved matches these words.")
+
+# Terminology Enforcement
+st.subheader("Terminology Check")
+st.caption("Flags source terms whose approved glossary translation is missing from the target segment.")
+term_sources = ["Single pair"]
+if st.session_state.get("alignment"):
+    term_sources.insert(0, "Aligned pairs (Data Engineering)")
+if st.session_state.get("tm"):
+    term_sources.insert(0, f"Imported TM ({st.session_state['tm']['name']})")
+term_source = st.radio("Segments to check", term_sources, horizontal=True, key=make_key(0, "rad", "term_source"))
+
+detected = (None, None)
+if term_source.startswith("Imported TM"):
+    tm_store = st.session_state["tm"]["store"]
+    tm_pair = st.selectbox(
+        "TM language pair",
+        list(tm_store.language_pairs()),
+        format_func=lambda pair: f"{pair[0]} → {pair[1]}",
+        key=make_key(0, "sel", "term_tm_pair"),
+    )
+    detected = tm_pair or detected
+elif term_source.startswith("Aligned"):
+    alignment = st.session_state["alignment"]
+    detected = (alignment.get("src_lang"), alignment.get("tgt_lang"))
+    st.caption(f"{len(alignment['aligned']):,} aligned pairs from the Data Engineering page")
+else:
+    cols = st.columns(2)
+    term_src_text = cols[0].text_area(
+        "Source segment", "Our API uses machine learning.", height=80, key=make_key(0, "txt", "term_src")
+    )
+    term_tgt_text = cols[1].text_area(
+        "Target segment", "Notre interface de programmation utilise le ML.", height=80, key=make_key(0, "txt", "term_tgt")
+    )
+
+# Re-derive the glossary languages whenever the segments to check change
+if st.session_state.get("term_langs_for") != detected:
+    st.session_state["term_langs_for"] = detected
+    for purpose in ("term_src_lang", "term_tgt_lang"):
+        st.session_state.pop(make_key(0, "sel", purpose), None)
+glossary_langs = glossary.languages
+cols = st.columns(2)
+term_src_lang = cols[0].selectbox(
+    "Glossary source language", glossary_langs,
+    index=default_index(glossary_langs, detected[0] or glossary.source_lang),
+    format_func=str.upper, key=make_key(0, "sel", "term_src_lang"),
+)
+term_tgt_lang = cols[1].selectbox(
+    "Glossary target language", glossary_langs,
+    index=default_index(glossary_langs, detected[1], fallback=1),
+    format_func=str.upper, key=make_key(0, "sel", "term_tgt_lang"),
+)
+
+if st.button("Check terminology", key=make_key(0, "btn", "term_check")):
+    if term_src_lang == term_tgt_lang:
+        st.warning("Pick two different languages.")
+    else:
+        if term_source.startswith("Imported TM"):
+            pairs = tm_store.pairs(*tm_pair) if tm_pair else iter(())
+            checked = tm_store.language_pairs().get(tm_pair, 0)
+        elif term_source.startswith("Aligned"):
+            pairs = [(src, tgt) for src, tgt, _ in st.session_state["alignment"]["aligned"]]
+            checked = len(pairs)
+        else:
+            pairs = [(term_src_text, term_tgt_text)]
+            checked = 1
+
+        started = time.perf_counter()
+        checker = get_term_checker(glossary, term_src_lang, term_tgt_lang)
+        results = list(checker.check_pairs(pairs))
+        elapsed = time.perf_counter() - started
+
+        cols = st.columns(3)
+        cols[0].metric("Pairs checked", f"{checked:,}")
+        cols[1].metric("Pairs with issues", f"{len(results):,}")
+        cols[2].metric("Terms enforced", f"{checker.term_count:,}")
+        st.caption(f"Checked in {elapsed * 1000:.1f} ms · {term_src_lang.upper()} → {term_tgt_lang.upper()}")
+        if results:
+            render_term_issues(results)
+        elif checked:
+            st.success("All glossary terms use their approved translations.")
 
 # Human-in-the-Loop Annotation
 st.header("🎯 Human-in-the-Loop Annotation")
 st.markdown("**Upload data for expert annotation**")
-uploaded_file = st.file_uploader("Choose a file (TXT/JSON)", type=['txt', 'json'])
+work_queue = get_work_queue()
+uploaded_file = st.file_uploader(
+    "Choose a file (TXT: one task per line · JSON/JSONL: one task per object)",
+    type=["txt", "json", "jsonl"],
+    key=make_key(0, "upl", "annotation"),
+)
 if uploaded_file:
     st.success(f"File received: {uploaded_file.name}")
-    st.button("Send for Expert Review", type="primary")
\ No newline at end of file
+    if st.button("Send for Expert Review", type="primary", disabled="ingest_batch" in st.session_state):
+        ingestion = start_ingestion(work_queue, uploaded_file, uploaded_file.name, upload_format(uploaded_file.name))
+        st.session_state["ingest_batch"] = ingestion.batch_id
+if "ingest_batch" in st.session_state:
+    render_ingestion(st.session_state["ingest_batch"])
+render_flash()
+
+render_queue_summary(work_queue)
+
+# Review: lease a few tasks, label them, hand back the rest
+reviewer = st.text_input("Reviewer", "reviewer-1", key=make_key(0, "txt", "reviewer")).strip()
+review = st.session_state.get("review")
+cols = st.columns(2)
+cols[0].button(
+    f"Review next {LEASE_SIZE} tasks", key=make_key(0, "btn", "review_lease"),
+    disabled=not reviewer or bool(review), on_click=lease_reviews, args=(work_queue, reviewer),
+)
+if review:
+    cols[1].button("Release my tasks", key=make_key(0, "btn", "review_release"), on_click=release_reviews, args=(work_queue,))
+    expires = time.strftime("%H:%M", time.localtime(review["tasks"][0].lease_expires))
+    with st.form(make_key(0, "frm", "review")):
+        st.caption(f"{len(review['tasks'])} task(s) leased to {review['reviewer']} until {expires}")
+        for task in review["tasks"]:
+            st.markdown(f"**Task {task.id}** · {task_text(task.payload)}")
+            cols = st.columns([0.4, 0.6])
+            cols[0].radio("Label", REVIEW_LABELS, horizontal=True, key=f"review_label_{task.id}")
+            cols[1].text_input("Note", key=f"review_note_{task.id}")
+        st.form_submit_button("Submit reviews", type="primary", on_click=submit_reviews, args=(work_queue,))
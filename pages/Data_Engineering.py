@@ -1,14 +1,24 @@
 # 2_Data_Engineering.py
-import string
+import io
+import os
+import shutil
+import zipfile
 import streamlit as st
 import pandas as pd
-import re
-import json
 
-from utils import make_key, text_area_with_controls, bilingual_sample_controls, render_deduplication_results
+from utils import make_key, load_asset_store, text_area_with_controls, bilingual_sample_controls, render_deduplication_results
 from ls_ui.grid import dashboard, full
 from ls_ui.cards import card
 from ls_ui.motion import fade_block, end
+from ls_ui.env import PUBLIC_MODE, DEDUP_WORK_DIR
+from ls_nlp.align import align_sentences
+from ls_nlp.bulk import discard_output, new_output_path, upload_format
+from ls_nlp.cleaning import MARKUP_EXTENSIONS, CleaningPipeline, clean_file, clean_markup_file
+from ls_nlp.dedup import deduplicate_segments
+from ls_nlp.simhash import MAX_DISTANCE, hamming_threshold, similarity_from_hamming, supports
+from ls_nlp.dedup_disk import deduplicate_file, discard_output_dir, new_output_dir
+from ls_nlp.langid import detect_language
+from ls_nlp.parallel_io import iter_tmx, iter_jsonl, export_file
 
 
 # -------------------------------------------------
@@ -16,31 +26,30 @@ from ls_ui.motion import fade_block, end
 # -------------------------------------------------
 
 # --- Align helper function ---
-def simple_align(src_text: str, tgt_text: str):
-    """Align sentences by index from source and target texts, with mismatch check."""
+def split_sentences(text: str):
     delimiters = [".", "。", "！", "？"]
-    def split_sentences(text):
-        for d in delimiters:
-            text = text.replace(d, ".")  # normalize to "."
-        return [s.strip() for s in text.split(".") if s.strip()]
+    for d in delimiters:
+        text = text.replace(d, ".")  # normalize to "."
+    return [s.strip() for s in text.split(".") if s.strip()]
 
+def simple_align(src_text: str, tgt_text: str):
+    """
+    Align source and target sentences with the length-based (Gale-Church) aligner.
+    Sentence counts may differ: 1-2, 2-1 merges and unmatched sentences are allowed.
+    Returns ([(src, tgt, score)], src_sentences, tgt_sentences).
+    """
     src_sentences = split_sentences(src_text)
     tgt_sentences = split_sentences(tgt_text)
+    aligned = align_sentences(src_sentences, tgt_sentences)
+    return aligned, src_sentences, tgt_sentences
 
-    # Check mismatch
-    if len(src_sentences) != len(tgt_sentences):
-        return None, src_sentences, tgt_sentences
-
-    # Align by index
-    pairs = [(src, tgt) for src, tgt in zip(src_sentences, tgt_sentences)]
-    return pairs, src_sentences, tgt_sentences
-
-def render_alignment_results(pairs):
-    for i, (src, tgt) in enumerate(pairs, start=1):
-        cols = st.columns([0.06, 0.47, 0.47])
+def render_alignment_results(aligned):
+    for i, (src, tgt, score) in enumerate(aligned, start=1):
+        cols = st.columns([0.06, 0.40, 0.40, 0.14])
         cols[0].markdown(f"**{i}.**")
-        cols[1].write(src)
-        cols[2].write(tgt)
+        cols[1].write(src or "∅")
+        cols[2].write(tgt or "∅")
+        cols[3].caption(f"score {score:.2f}")
 
 # --- Sample data for alignment ---
 ALIGN_SAMPLES = {
@@ -58,105 +67,99 @@ ALIGN_SAMPLES = {
     }
 }
 
-# --- TMX Builder ---
-def build_tmx_lite(pairs, src_lang="src", tgt_lang="tgt"):
-    tus = []
-    for i, (src, tgt) in enumerate(pairs, start=1):
-        tus.append(
-            f"""
-            <tu tuid="{i}">
-              <tuv xml:lang="{src_lang}"><seg>{src}</seg></tuv>
-              <tuv xml:lang="{tgt_lang}"><seg>{tgt}</seg></tuv>
-            </tu>
-            """.strip()
-        )
-
-    return f"""<?xml version="1.0" encoding="UTF-8"?>
-<tmx version="1.4">
-  <body>
-    {"".join(tus)}
-  </body>
-</tmx>
-"""
-
-# --- JSONL Builder ---
-
-def build_jsonl(pairs, src_lang="src", tgt_lang="tgt"):
-    lines = []
-    for src, tgt in pairs:
-        lines.append(json.dumps({
-            "source": src,
-            "target": tgt,
-            "src_lang": src_lang,
-            "tgt_lang": tgt_lang
-        }, ensure_ascii=False))
-    return "\n".join(lines)
-
 # --- Cleaning helpers ---
-def clean_tags(text: str) -> str:
-    """Remove HTML/XML tags but keep inner content."""
-    return re.sub(r"</?[^>]+>", "", text)   # removes <tag> and </tag>, keeps content
-
-def to_lower(text: str) -> str:
-    return text.lower()
-
-def strip_punct(text: str) -> str:
-    return text.translate(str.maketrans("", "", string.punctuation))
+CLEAN_CHUNK_SIZE = 1000                # documents per worker task
+CLEAN_PARALLEL_MIN_BYTES = 2_000_000   # smaller uploads are cleaned in-process
 
-def render_cleaning_steps(steps):
+def clean_uploads(uploads, pipeline: CleaningPipeline, on_file=None):
+    """
+    Clean each TXT/JSONL upload with `pipeline` into a zip of same-named files.
+    HTML/XML uploads are one document each, streamed through the tag stripper into .txt.
+    Returns (zip path, documents cleaned, previews of the first documents).
+    """
+    zip_path = new_output_path(".zip")
+    docs, previews = 0, []
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i, uploaded in enumerate(uploads):
+            markup = uploaded.name.lower().endswith(MARKUP_EXTENSIONS)
+            name = f"{uploaded.name.rsplit('.', 1)[0]}.txt" if markup else uploaded.name
+            with archive.open(name, "w") as member, \
+                    io.TextIOWrapper(member, encoding="utf-8", newline="") as out:
+                if markup:
+                    n, traces = clean_markup_file(uploaded, out, pipeline)
+                else:
+                    n, traces = clean_file(
+                        uploaded, upload_format(uploaded.name), out, pipeline,
+                        chunk_size=CLEAN_CHUNK_SIZE,
+                        parallel=uploaded.size >= CLEAN_PARALLEL_MIN_BYTES,
+                    )
+                traces = traces[:max(0, 3 - len(previews))]
+            docs += n
+            previews.extend(traces)
+            if on_file:
+                on_file(i + 1, docs)
+    return zip_path, docs, previews
+
+def render_cleaning_steps(steps, key_prefix=None):
     """
     steps: list of (step_name, before, after)
+    key_prefix: needed when several traces are rendered on the same run
     """
     for i, (name, before, after) in enumerate(steps, start=1):
         st.markdown(f"**{i}. {name}**")
         cols = st.columns(2)
-        cols[0].text_area("Before", before, height=120, disabled=True)
-        cols[1].text_area("After", after, height=120, disabled=True)
-
-# --- Deduplication helpers ---
-def normalize_text(text: str) -> str:
-    text = text.lower()
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"[^\w\s]", "", text)
-    return text.strip()
-
-
-def token_overlap(a: str, b: str) -> float:
-    a_tokens = set(a.split())
-    b_tokens = set(b.split())
-    if not a_tokens or not b_tokens:
-        return 0.0
-    return len(a_tokens & b_tokens) / len(a_tokens | b_tokens)
-
-
-def deduplicate_segments(segments, similarity_threshold=0.8):
-    kept = []
-    removed = []
-
-    for seg in segments:
-        norm = normalize_text(seg)
-        is_duplicate = False
-
-        for kept_seg in kept:
-            kept_norm = normalize_text(kept_seg)
-
-            # Exact match
-            if norm == kept_norm:
-                removed.append((seg, kept_seg, 1.0))
-                is_duplicate = True
-                break
-
-            # Similarity match
-            sim = token_overlap(norm, kept_norm)
-            if sim >= similarity_threshold:
-                removed.append((seg, kept_seg, sim))
-                is_duplicate = True
-                break
-
-        if not is_duplicate:
-            kept.append(seg)
+        keys = (f"{key_prefix}_{i}_before", f"{key_prefix}_{i}_after") if key_prefix else (None, None)
+        cols[0].text_area("Before", before, height=120, disabled=True, key=keys[0])
+        cols[1].text_area("After", after, height=120, disabled=True, key=keys[1])
+
+# --- Deduplication backends ---
+DEDUP_METHODS = {
+    "MinHash LSH (fast, approximate)": "minhash",
+    "SimHash (64-bit fingerprints, high thresholds)": "simhash",
+    "Exhaustive (exact, small inputs)": "exhaustive",
+}
 
-    return kept, removed
+def run_file_dedup(source, threshold: float, on_chunk=None) -> dict:
+    """
+    Out-of-core dedup of an uploaded file or a server-side path (str).
+    Results are written under DEDUP_WORK_DIR; the summary is returned.
+    """
+    out_dir = new_output_dir(DEDUP_WORK_DIR)
+    try:
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                return deduplicate_file(f, out_dir, threshold, total=os.path.getsize(source), on_chunk=on_chunk)
+        return deduplicate_file(source, out_dir, threshold, total=source.size, on_chunk=on_chunk)
+    except BaseException:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        raise
+
+def render_file_dedup_summary(summary: dict, preview_rows: int = 20):
+    cols = st.columns(4)
+    cols[0].metric("Segments", f"{summary['segments']:,}")
+    cols[1].metric("Kept", f"{summary['kept']:,}")
+    cols[2].metric("Exact duplicates", f"{summary['exact']:,}")
+    cols[3].metric("Near duplicates", f"{summary['near']:,}")
+    st.caption(
+        f"Threshold {summary['threshold']:.2f} · LSH {summary['bands']}×{summary['rows']} · "
+        f"{summary['seconds']:.1f}s"
+    )
+    outputs = summary["outputs"]
+    preview = pd.read_csv(outputs["removed"], sep="\t", nrows=preview_rows, dtype=str)
+    if not preview.empty:
+        st.markdown("### 🗑️ Removed (first rows)")
+        st.dataframe(preview, use_container_width=True, hide_index=True)
+    cols = st.columns(2)
+    with open(outputs["kept"], "rb") as f:
+        cols[0].download_button(
+            "📥 Kept segments (TXT)", f, file_name="kept.txt", mime="text/plain",
+            key=make_key(2, "dl", "dedup_kept")
+        )
+    with open(outputs["removed"], "rb") as f:
+        cols[1].download_button(
+            "📥 Removed report (TSV)", f, file_name="removed.tsv", mime="text/tab-separated-values",
+            key=make_key(2, "dl", "dedup_removed")
+        )
 
 
 # -------------------------------------------------
@@ -200,43 +203,67 @@ with tabs[0]:
             )
 
         if st.button("Align Sentences", key=make_key(0, "btn", "align")):
-            aligned_pairs, src_sents, tgt_sents = simple_align(src_text, tgt_text)
+            aligned, src_sents, tgt_sents = simple_align(src_text, tgt_text)
 
-            if aligned_pairs is None:
-                st.error(
-                    f"❌ Sentence count mismatch — "
-                    f"Source: {len(src_sents)}, Target: {len(tgt_sents)}"
-                )
-                st.info(
-                    "💡 Ensure both texts contain the same number of sentences "
-                    "before alignment."
-                )
+            if not src_sents or not tgt_sents:
+                st.session_state.pop("alignment", None)
+                st.warning("Please provide both source and target text.")
             else:
-                st.success(f"✅ Aligned {len(aligned_pairs)} sentence pairs")
-                render_alignment_results(aligned_pairs)
+                st.session_state["alignment"] = {
+                    "aligned": aligned,
+                    "src_count": len(src_sents),
+                    "tgt_count": len(tgt_sents),
+                    "src_lang": detect_language(src_text),
+                    "tgt_lang": detect_language(tgt_text),
+                }
+                # Pre-fill the export language codes from the detected languages
+                st.session_state[make_key(0, "txt", "align_src_lang")] = st.session_state["alignment"]["src_lang"]
+                st.session_state[make_key(0, "txt", "align_tgt_lang")] = st.session_state["alignment"]["tgt_lang"]
+
+        # Results persist across reruns, so export options can be changed after aligning
+        alignment = st.session_state.get("alignment")
+        if alignment:
+            aligned = alignment["aligned"]
+            aligned_pairs = [(src, tgt) for src, tgt, _ in aligned]
+            st.success(
+                f"✅ Aligned {len(aligned)} pairs "
+                f"(source: {alignment['src_count']} sentences, target: {alignment['tgt_count']} sentences)"
+            )
+            render_alignment_results(aligned)
 
-                # ---- Export section (lightweight, optional)
-                st.markdown("### 📦 Use these aligned pairs as")
+            # ---- Export section (lightweight, optional)
+            st.markdown("### 📦 Use these aligned pairs as")
 
-                tmx_content = build_tmx_lite(aligned_pairs, src_lang="fr", tgt_lang="en")
-                jsonl_content = build_jsonl(aligned_pairs, src_lang="fr", tgt_lang="en")
+            lang_cols = st.columns(2)
+            src_lang = lang_cols[0].text_input(
+                "Source language code", key=make_key(0, "txt", "align_src_lang")
+            ).strip() or "und"
+            tgt_lang = lang_cols[1].text_input(
+                "Target language code", key=make_key(0, "txt", "align_tgt_lang")
+            ).strip() or "und"
 
-                cols = st.columns(2)
+            cols = st.columns(2)
 
-                with cols[0]:
-                    st.download_button(
-                        "📥 Translation Memory (TMX)",
-                        tmx_content,
-                        file_name="aligned.tmx",
-                        mime="application/xml"
-                    )
-                with cols[1]:
-                    st.download_button(
-                        "📥 Training Data (JSONL)",
-                        jsonl_content,
-                        file_name="aligned.jsonl",
-                        mime="application/json"
-                    )   
+            # Deferred downloads: the export is streamed only when the button is clicked
+            with cols[0]:
+                st.download_button(
+                    "📥 Translation Memory (TMX)",
+                    lambda: export_file(iter_tmx(aligned_pairs, src_lang, tgt_lang), ".tmx"),
+                    file_name="aligned.tmx",
+                    mime="application/xml"
+                )
+            with cols[1]:
+                st.download_button(
+                    "📥 Training Data (JSONL)",
+                    lambda: export_file(iter_jsonl(aligned_pairs, src_lang, tgt_lang), ".jsonl"),
+                    file_name="aligned.jsonl",
+                    mime="application/json"
+                )
+            if st.button("💾 Save to TM (asset store)", key=make_key(0, "btn", "align_save_tm")):
+                added = load_asset_store().add_tm_units(
+                    ((src, tgt, src_lang, tgt_lang) for src, tgt in aligned_pairs), origin="alignment"
+                )
+                st.success(f"Saved {added} new units ({len(aligned_pairs) - added} already stored)")
     with right:
         with card("Parallel Text Alignment", muted=True):
             st.info("Run 'Align Sentences' to see results.")
@@ -265,50 +292,86 @@ with tabs[1]:
 
             default_text = "<p>Hello <b>World</b>! This is <i>sample</i> text.</p>"
 
+            clean_mode = st.radio(
+                "Input",
+                ["Text", "Files (TXT/JSONL/HTML)"],
+                horizontal=True,
+                key=make_key(1, "radio", "clean_mode")
+            )
+            files_mode = clean_mode != "Text"
+
             if "clean_raw_text" not in st.session_state:
                 st.session_state.clean_raw_text = ""
 
-            cols = st.columns(2)
-            with cols[0]:
-                if st.button("Use Default Text", key=make_key(1, "btn", "default_clean")):
-                    st.session_state.clean_raw_text = default_text
-            with cols[1]:
-                if st.button("Reset Text", key=make_key(1, "btn", "reset_clean")):
-                    st.session_state.clean_raw_text = ""
+            raw_text = ""
+            clean_files = []
+            if not files_mode:
+                cols = st.columns(2)
+                with cols[0]:
+                    if st.button("Use Default Text", key=make_key(1, "btn", "default_clean")):
+                        st.session_state.clean_raw_text = default_text
+                with cols[1]:
+                    if st.button("Reset Text", key=make_key(1, "btn", "reset_clean")):
+                        st.session_state.clean_raw_text = ""
 
-            raw_text = st.text_area(
-                "Raw Text",
-                height=200,
-                key="clean_raw_text"
-            )
+                raw_text = st.text_area(
+                    "Raw Text",
+                    height=200,
+                    key="clean_raw_text"
+                )
+            else:
+                clean_files = st.file_uploader(
+                    "Files to clean (TXT: one document per line · JSONL: `text` field · HTML/XML: one document)",
+                    type=["txt", "jsonl", "html", "htm", "xml"],
+                    accept_multiple_files=True,
+                    key=make_key(1, "upl", "clean_files")
+                )
 
             st.markdown("**Cleaning Options**")
             apply_tags = st.checkbox("Remove HTML / XML tags", value=True)
             apply_lower = st.checkbox("Convert to lowercase", value=True)
             apply_punct = st.checkbox("Strip punctuation", value=False)
 
-        if st.button("Run Cleaning", key=make_key(1, "btn", "run_clean")):
-            steps = []
-            current = raw_text
-
-            if apply_tags:
-                cleaned = clean_tags(current)
-                steps.append(("Remove tags", current, cleaned))
-                current = cleaned
-
-            if apply_lower:
-                cleaned = to_lower(current)
-                steps.append(("Lowercase", current, cleaned))
-                current = cleaned
+        pipeline = CleaningPipeline(
+            [step for step, on in (("tags", apply_tags), ("lower", apply_lower), ("punct", apply_punct)) if on]
+        )
 
-            if apply_punct:
-                cleaned = strip_punct(current)
-                steps.append(("Strip punctuation", current, cleaned))
-                current = cleaned
+        if files_mode:
+            if st.button("Clean Files", key=make_key(1, "btn", "run_clean_files"), disabled=not clean_files):
+                if not pipeline:
+                    st.warning("No cleaning options selected.")
+                else:
+                    previous = st.session_state.pop("clean_files_result", None)
+                    discard_output(previous and previous["path"])
+                    bar = st.progress(0.0, text="Cleaning…")
+                    path, docs, previews = clean_uploads(
+                        clean_files,
+                        pipeline,
+                        on_file=lambda n, docs: bar.progress(
+                            n / len(clean_files), text=f"{n}/{len(clean_files)} files · {docs:,} documents"
+                        ),
+                    )
+                    bar.empty()
+                    st.session_state["clean_files_result"] = {
+                        "path": path, "docs": docs, "files": len(clean_files), "previews": previews,
+                    }
+
+            result = st.session_state.get("clean_files_result")
+            if result:
+                st.success(f"✅ Cleaned {result['docs']:,} documents in {result['files']} file(s)")
+                for n, trace in enumerate(result["previews"], start=1):
+                    with st.expander(f"Preview — document {n}", expanded=n == 1):
+                        render_cleaning_steps(trace, key_prefix=make_key(1, "txt", f"clean_preview{n}"))
+                with open(result["path"], "rb") as f:
+                    st.download_button(
+                        "📥 Download cleaned files (ZIP)", f, file_name="cleaned.zip", mime="application/zip",
+                        key=make_key(1, "dl", "clean_files")
+                    )
 
-            if steps:
+        elif st.button("Run Cleaning", key=make_key(1, "btn", "run_clean")):
+            if pipeline:
                 st.success("✅ Cleaning pipeline applied")
-                render_cleaning_steps(steps)
+                render_cleaning_steps(pipeline.trace(raw_text))
             else:
                 st.warning("No cleaning options selected.")
 
@@ -335,6 +398,14 @@ with tabs[2]:
     with left:
         with card("🧪 Dataset Deduplication & Similarity Filtering", refreshable=False):
 
+            dedup_mode = st.radio(
+                "Input",
+                ["Text", "File (one segment per line)"],
+                horizontal=True,
+                key=make_key(2, "radio", "dedup_mode")
+            )
+            file_mode = dedup_mode != "Text"
+
             default_text = """
                 Hello world
                 Hello world!
@@ -347,19 +418,33 @@ with tabs[2]:
             if "dedup_text" not in st.session_state:
                 st.session_state.dedup_text = ""
 
-            cols = st.columns(2)
-            with cols[0]:
-                if st.button("Use Sample Text", key=make_key(2, "btn", "default_dedup")):
-                    st.session_state.dedup_text = default_text
-            with cols[1]:
-                if st.button("Reset Text", key=make_key(2, "btn", "reset_dedup")):
-                    st.session_state.dedup_text = ""
+            raw_text = ""
+            dedup_file = dedup_path = None
+            if not file_mode:
+                cols = st.columns(2)
+                with cols[0]:
+                    if st.button("Use Sample Text", key=make_key(2, "btn", "default_dedup")):
+                        st.session_state.dedup_text = default_text
+                with cols[1]:
+                    if st.button("Reset Text", key=make_key(2, "btn", "reset_dedup")):
+                        st.session_state.dedup_text = ""
 
-            raw_text = st.text_area(
-                "One segment per line",
-                height=220,
-                key="dedup_text"
-            )
+                raw_text = st.text_area(
+                    "One segment per line",
+                    height=220,
+                    key="dedup_text"
+                )
+            else:
+                dedup_file = st.file_uploader(
+                    "Corpus file (UTF-8, one segment per line)",
+                    type=["txt"],
+                    key=make_key(2, "upl", "dedup_file")
+                )
+                if not PUBLIC_MODE:
+                    dedup_path = st.text_input(
+                        "…or a file path on the server",
+                        key=make_key(2, "txt", "dedup_path")
+                    ).strip() or None
 
             similarity_threshold = st.slider(
                 "Similarity threshold",
@@ -369,7 +454,50 @@ with tabs[2]:
                 step=0.05
             )
 
-        if st.button("Run Deduplication", key=make_key(2, "btn", "run_dedup")):
+            if not file_mode:
+                dedup_method = st.selectbox(
+                    "Backend",
+                    list(DEDUP_METHODS),
+                    key=make_key(2, "sel", "dedup_method"),
+                )
+                dedup_backend = DEDUP_METHODS[dedup_method]
+                if dedup_backend == "simhash" and not supports(similarity_threshold):
+                    dedup_backend = "minhash"
+                    st.caption(
+                        f"SimHash needs a threshold above {similarity_from_hamming(MAX_DISTANCE + 1):.2f}; "
+                        "MinHash is used at this threshold."
+                    )
+                elif dedup_backend == "simhash":
+                    distance = hamming_threshold(similarity_threshold)
+                    st.caption(
+                        f"Similarity ≥ {similarity_threshold:.2f} ≈ at most {distance} of 64 fingerprint bits differ. "
+                        "SimHash is noisy on short segments; prefer MinHash there."
+                    )
+
+        if file_mode:
+            source = dedup_path or dedup_file
+            if st.button("Run File Deduplication", key=make_key(2, "btn", "run_dedup_file"), disabled=not source):
+                if isinstance(source, str) and not os.path.isfile(source):
+                    st.error(f"File not found: {source}")
+                else:
+                    # Outputs are about as large as the input; keep only the latest run
+                    discard_output_dir(st.session_state.pop("dedup_file_result", None))
+                    bar = st.progress(0.0, text="Deduplicating…")
+                    summary = run_file_dedup(
+                        source,
+                        similarity_threshold,
+                        on_chunk=lambda segments, kept, removed, fraction: bar.progress(
+                            fraction, text=f"{segments:,} segments · {kept:,} kept · {removed:,} removed"
+                        ),
+                    )
+                    bar.empty()
+                    st.session_state["dedup_file_result"] = summary
+
+            if st.session_state.get("dedup_file_result"):
+                st.success("✅ Deduplication completed")
+                render_file_dedup_summary(st.session_state["dedup_file_result"])
+
+        elif st.button("Run Deduplication", key=make_key(2, "btn", "run_dedup")):
             segments = [s.strip() for s in raw_text.splitlines() if s.strip()]
 
             if len(segments) < 2:
@@ -377,7 +505,8 @@ with tabs[2]:
             else:
                 kept, removed = deduplicate_segments(
                     segments,
-                    similarity_threshold=similarity_threshold
+                    similarity_threshold=similarity_threshold,
+                    method=dedup_backend,
                 )
 
                 st.success("✅ Deduplication completed")
@@ -1,33 +1,69 @@
 import time
+import hashlib
+import io
 import streamlit as st
-import matplotlib.pyplot as plt
-import jieba
 import re
 import pandas as pd
 from collections import Counter
-from transformers.pipelines import pipeline
-from langdetect import detect
-from wordcloud import WordCloud
+from wordcloud import WordCloud, STOPWORDS
 
 from utils import make_key, text_area_with_controls, model_loading_notice
+from ls_nlp.batching import MicroBatcher
+from ls_nlp.cache import InferenceCache
+from ls_nlp.sentiment import SENTIMENT_MODEL, get_sentiment_pipeline, analyze_long_document
+from ls_nlp.warmup import warmup_status
+from ls_nlp.langid import detect_language as identify_language, detect_languages
+from ls_nlp.segmentation import init_jieba, segment_large
+from ls_nlp.keywords import KeywordIndex
+from ls_nlp.ner import scan_entities, scan_documents, highlight_entities
+from ls_nlp.workers import imap_bounded
+from ls_nlp.bulk import (
+    CsvRecordWriter, JsonlRecordWriter, csv_columns, discard_output, iter_chunks,
+    iter_record_chunks, iter_records, new_output_path, read_progress, upload_format,
+)
 from ls_ui.grid import dashboard, full
 from ls_ui.cards import card
 from ls_ui.motion import fade_block, end
+from ls_ui.env import (
+    INFERENCE_CACHE_PATH, INFERENCE_CACHE_MAX_ENTRIES, SENTIMENT_BACKEND, MODEL_CACHE_DIR,
+    JIEBA_CACHE_DIR,
+)
 
 # -------------------------------------------------
 # Resource loading (cloud-safe, cached)
 # -------------------------------------------------
 
+# Cache keys include the backend: int8 scores differ slightly from full precision.
+SENTIMENT_CACHE_MODEL = f"{SENTIMENT_MODEL}:{SENTIMENT_BACKEND}"
+LANGDETECT_MODEL = "langdetect:seeded"
+
 @st.cache_resource(show_spinner="Loading multilingual sentiment model…")
 def load_sentiment_pipeline():
-    return pipeline(
-        "sentiment-analysis",
-        #model="tabularisai/multilingual-sentiment-analysis" #returns Positive/Negative/Neutral; heavier
-        model="nlptown/bert-base-multilingual-uncased-sentiment" #returns 1-5 star ratings; lightweight
-        #model="cardiffnlp/twitter-xlm-roberta-base-sentiment" #Twitter-specific model; requires extra preprocessing; faster loading but less stable and slightly weaker Chinese support
+    # Same process-wide instance app.py warms up at startup (instant once warm-up is done).
+    # LS_SENTIMENT_BACKEND=int8 serves a quantized copy exported once to LS_MODEL_CACHE_DIR
+    return get_sentiment_pipeline(SENTIMENT_MODEL, backend=SENTIMENT_BACKEND, cache_dir=MODEL_CACHE_DIR)
+
+
+@st.cache_resource(show_spinner=False)
+def load_sentiment_batcher():
+    """
+    Process-wide scheduler around the cached pipeline.
+    Concurrent sessions are grouped into one padded forward pass.
+    """
+    sentiment = load_sentiment_pipeline()
+    return MicroBatcher(
+        lambda texts: sentiment(texts, batch_size=len(texts), truncation=True),
+        max_batch_size=32,
+        max_wait_ms=15,
     )
 
 
+@st.cache_resource(show_spinner=False)
+def load_inference_cache():
+    """On-disk cache of model outputs, shared by all sessions and restarts."""
+    return InferenceCache(INFERENCE_CACHE_PATH, max_entries=INFERENCE_CACHE_MAX_ENTRIES)
+
+
 # -------------------------------------------------
 # Utilities
 # -------------------------------------------------
@@ -42,16 +78,37 @@ def rate_limit(key: str, seconds: int = 5):
 
 
 def detect_language(text: str) -> str:
-    try:
-        lang = detect(text.strip())
-        return "zh" if lang.startswith("zh") else lang
-    except Exception:
-        return "unknown"
+    return load_inference_cache().get_or_compute(LANGDETECT_MODEL, text, identify_language)
+
+def _analyze_sentiment(text: str):
+    batcher = load_sentiment_batcher()  # lazy load, shared by all sessions
+    result = batcher(text)
+    return [result["label"], result["score"]]
 
 def analyze_sentiment(text: str):
-    pipeline = load_sentiment_pipeline()  # lazy load
-    result = pipeline(text)[0]
-    return result["label"], result["score"]
+    label, score = load_inference_cache().get_or_compute(SENTIMENT_CACHE_MODEL, text, _analyze_sentiment)
+    return label, score
+
+def analyze_document(text: str) -> dict:
+    """Sliding-window sentiment for long texts (cached like single runs)."""
+    return load_inference_cache().get_or_compute(
+        f"{SENTIMENT_CACHE_MODEL}:windows",
+        text,
+        lambda t: analyze_long_document(load_sentiment_pipeline(), t),
+    )
+
+def render_window_scores(text: str, windows):
+    rows = [
+        {
+            "Window": i,
+            "Excerpt": text[w["start"]:w["end"]][:80].strip() + "…",
+            "Tokens": w["tokens"],
+            "Rating": w["label"],
+            "Score": round(w["score"], 3),
+        }
+        for i, w in enumerate(windows, start=1)
+    ]
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
 
 def sentiment_badge(label: str) -> str:
     label = label.lower()
@@ -71,66 +128,165 @@ def normalize_sentiment(label: str):
         return "🤔 **Neutral**"
     return "🙂 **Positive**"
 
+# --- Bulk (file) sentiment ---
+BULK_CHUNK_SIZE = 256   # records read from the upload at a time
+BULK_BATCH_SIZE = 32    # records per forward pass
+
+def score_sentiment_file(uploaded, fmt: str, text_field: str, on_chunk=None):
+    """
+    Stream a CSV/JSONL upload through the pipeline chunk by chunk and write an
+    annotated CSV to a temp file. Only one chunk of records is held at a time.
+    Returns (output path, star counts, row count).
+    """
+    sentiment = load_sentiment_pipeline()
+    stars = Counter()
+    rows = 0
+    path = new_output_path(".csv")
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        writer = CsvRecordWriter(out, extra_fields=["language", "sentiment_label", "sentiment_score"])
+        for chunk in iter_record_chunks(uploaded, fmt, BULK_CHUNK_SIZE):
+            texts = [str(record.get(text_field) or "").strip() for record in chunk]
+            todo = [i for i, text in enumerate(texts) if text]
+            if todo:
+                languages = detect_languages([texts[i] for i in todo])
+                results = sentiment(
+                    [texts[i] for i in todo], batch_size=BULK_BATCH_SIZE, truncation=True
+                )
+                for i, lang, result in zip(todo, languages, results):
+                    chunk[i]["language"] = lang
+                    chunk[i]["sentiment_label"] = result["label"]
+                    chunk[i]["sentiment_score"] = round(result["score"], 4)
+                    stars[result["label"]] += 1
+            writer.write_rows(chunk)
+            rows += len(chunk)
+            if on_chunk:
+                on_chunk(rows, stars, read_progress(uploaded, uploaded.size))
+    return path, stars, rows
+
+def render_star_distribution(stars: Counter, target=None):
+    target = target or st
+    if stars:
+        target.bar_chart(pd.Series(dict(sorted(stars.items())), name="Reviews"))
+
 # --- Word Cloud Generation ---
-def generate_wordcloud(text: str, lang: str):
-    if lang == "zh":
-        text = " ".join(jieba.cut(text))
+def segment_chinese(text: str) -> list[str]:
+    init_jieba(JIEBA_CACHE_DIR)  # no-op once the app warm-up has run
+    return segment_large(text)
+
+WORDCLOUD_SIZE = (900, 450)
+WORDCLOUD_MAX_WORDS = 120
 
+def word_frequencies(text: str, lang: str) -> dict:
+    """Token counts for the cloud, so WordCloud only has to do layout."""
+    if lang == "zh":
+        tokens = [w for w in segment_chinese(text) if re.fullmatch(r"\w+", w)]
+    else:
+        tokens = re.findall(r"\w[\w']+", text.lower())
+    counts = Counter(t for t in tokens if t not in STOPWORDS and not t.isdigit())
+    return dict(counts.most_common(WORDCLOUD_MAX_WORDS))
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _wordcloud_png(text_hash: str, lang: str, width: int, height: int, _text: str) -> bytes:
+    # Keyed by (text hash, language, size); the raw text is excluded from hashing.
+    frequencies = word_frequencies(_text, lang)
+    if not frequencies:
+        return b""
     wc = WordCloud(
-        width=900,
-        height=450,
+        width=width,
+        height=height,
         background_color="white",
-        max_words=120,
-        collocations=False
-    ).generate(text)
+        max_words=WORDCLOUD_MAX_WORDS,
+    ).generate_from_frequencies(frequencies)
+    buffer = io.BytesIO()
+    wc.to_image().save(buffer, format="PNG")
+    return buffer.getvalue()
 
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.imshow(wc, interpolation="bilinear")
-    ax.axis("off")
-    return fig
+def generate_wordcloud(text: str, lang: str, size=WORDCLOUD_SIZE) -> bytes:
+    """PNG bytes of the word cloud (empty if the text has no usable words)."""
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return _wordcloud_png(text_hash, lang, size[0], size[1], _text=text)
 
 # --- Keyword Extraction ---
-def extract_keywords(text, top_n=5):
-    words = re.findall(r"\b\w+\b", text.lower())
-    stopwords = {"the","and","is","in","of","to","a","was","as"}
-    filtered = [w for w in words if w not in stopwords and len(w) > 2]
-    counts = Counter(filtered)
-    return counts.most_common(top_n)
+KEYWORD_CHUNK_SIZE = 1000
+
+def get_keyword_index() -> KeywordIndex:
+    """Per-session document-frequency index; grows with every text or collection analyzed."""
+    if "keyword_index" not in st.session_state:
+        init_jieba(JIEBA_CACHE_DIR)
+        st.session_state.keyword_index = KeywordIndex()
+    return st.session_state.keyword_index
+
+def extract_keywords(text, top_n=5, method="bm25"):
+    return get_keyword_index().extract([text], top_n, method)[0]
+
+def extract_collection_keywords(uploaded, fmt: str, text_field: str, top_n: int, method: str, on_chunk=None):
+    """
+    Index an uploaded collection chunk by chunk, then score every document against
+    the final document frequencies. Per-document keywords go to a temp CSV.
+    Returns (output path, corpus keywords, document count).
+    """
+    index = get_keyword_index()
+    chunks = []  # sparse term counts per chunk: compact, and needed once DF is final
+    for records in iter_record_chunks(uploaded, fmt, KEYWORD_CHUNK_SIZE):
+        texts = [str(record.get(text_field) or "") for record in records]
+        chunks.append(index.add_documents(texts))
+        if on_chunk:
+            on_chunk(sum(c.shape[0] for c in chunks), read_progress(uploaded, uploaded.size))
+
+    totals = 0
+    doc_id = 0
+    path = new_output_path(".csv")
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        writer = CsvRecordWriter(out)
+        for counts in chunks:
+            scores = index.score(counts, method)
+            totals = totals + index.column_totals(scores)
+            rows = []
+            for keywords in index.top_keywords(scores, top_n):
+                doc_id += 1
+                rows.append({
+                    "doc_id": doc_id,
+                    "keywords": "; ".join(term for term, _ in keywords),
+                    "scores": "; ".join(f"{score:.3f}" for _, score in keywords),
+                })
+            writer.write_rows(rows)
+    return path, index.rank_terms(totals, 20) if doc_id else [], doc_id
 
 # --- Simple NER helper ---
 def simple_ner(text: str):
-    entities = []
-
-    # Proper nouns (capitalized words)
-    for match in re.findall(r"\b[A-Z][a-z]+\b", text):
-        entities.append((match, "Proper Noun"))
-
-    # Numbers
-    for match in re.findall(r"\b\d+\b", text):
-        entities.append((match, "Number"))
-
-    # Years (YYYY)
-    for match in re.findall(r"\b\d{4}\b", text):
-        entities.append((match, "Year"))
-
-    return entities
-
-def highlight_entities(text: str, entities):
-    """Wrap detected entities with colored spans."""
-    highlighted = text
-    for ent, label in entities:
-        color = {
-            "Proper Noun": "#FFD700",  # gold
-            "Number": "#87CEEB",       # light blue
-            "Year": "#90EE90"          # light green
-        }.get(label, "#FFB6C1")        # default pink
-
-        highlighted = re.sub(
-            fr"\b{ent}\b",
-            f"<span style='background-color:{color}; padding:2px; border-radius:3px;'>{ent}</span>",
-            highlighted
-        )
-    return highlighted
+    """Proper nouns, numbers and years as typed spans (one regex pass, see ls_nlp.ner)."""
+    return scan_entities(text)
+
+# --- Bulk NER ---
+NER_CHUNK_SIZE = 500                  # documents per worker task
+NER_PARALLEL_MIN_BYTES = 2_000_000    # smaller uploads are scanned in-process
+
+def scan_corpus(uploaded, fmt: str, out_fmt: str, on_chunk=None):
+    """
+    Scan every document of a TXT/JSONL upload in the worker pool and stream
+    entity rows (doc id, offsets, type, surface form) to a temp CSV/JSONL file.
+    Returns (output path, counts by type, document count).
+    """
+    counts = Counter()
+    docs = 0
+
+    def documents():
+        nonlocal docs
+        for n, record in enumerate(iter_records(uploaded, fmt), start=1):
+            docs = n
+            yield record.get("id", n), str(record.get("text") or "")
+
+    path = new_output_path(f".{out_fmt}")
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        writer = CsvRecordWriter(out) if out_fmt == "csv" else JsonlRecordWriter(out)
+        chunks = iter_chunks(documents(), NER_CHUNK_SIZE)
+        parallel = uploaded.size >= NER_PARALLEL_MIN_BYTES
+        for rows in imap_bounded(scan_documents, chunks, parallel=parallel):
+            writer.write_rows(rows)
+            counts.update(row["type"] for row in rows)
+            if on_chunk:
+                on_chunk(docs, counts, read_progress(uploaded, uploaded.size))
+    return path, counts, docs
 
 # -------------------------------------------------
 # TAB CONTENTS
@@ -152,51 +308,152 @@ with tabs[0]:
     left, right = dashboard()
     with left:
         with card("😍😞 Sentiment Analysis Tool", refreshable=False):
-            #default_text = "I love using Streamlit for building web apps. It's so easy and fun!"
-            samples = {
-                "Positive Review": "This product exceeded my expectations. Highly recommend to everyone!",
-                "Negative Review": "I am very disappointed with the quality. It broke after one use.",
-                "Neutral Review": "The item is okay, nothing special but does the job."
-            }
-            raw_text = text_area_with_controls(
-                tab=0,
-                state_key="sentiment_text",
-                #default_text=default_text,
-                samples=samples,
-                show_default=False,    # hide default button
-                show_samples=True,     # show sample selector
-                show_reset=True
+            mode = st.radio(
+                "Input",
+                ["Text", "File (CSV/JSONL)"],
+                horizontal=True,
+                key=make_key(0, "radio", "sentiment_mode")
+            )
+            bulk_mode = mode != "Text"
+            raw_text = ""
+            long_mode = False
+            if not bulk_mode:
+                #default_text = "I love using Streamlit for building web apps. It's so easy and fun!"
+                samples = {
+                    "Positive Review": "This product exceeded my expectations. Highly recommend to everyone!",
+                    "Negative Review": "I am very disappointed with the quality. It broke after one use.",
+                    "Neutral Review": "The item is okay, nothing special but does the job."
+                }
+                raw_text = text_area_with_controls(
+                    tab=0,
+                    state_key="sentiment_text",
+                    #default_text=default_text,
+                    samples=samples,
+                    show_default=False,    # hide default button
+                    show_samples=True,     # show sample selector
+                    show_reset=True
+                )
+                long_mode = st.checkbox(
+                    "Long-document mode (sliding windows over the 512-token limit)",
+                    key=make_key(0, "chk", "sentiment_long")
+                )
+            else:
+                uploaded = st.file_uploader(
+                    "Reviews file (one record per row / line)",
+                    type=["csv", "jsonl", "json"],
+                    key=make_key(0, "upl", "sentiment_file")
+                )
+                text_field = "text"
+                if uploaded:
+                    fmt = upload_format(uploaded.name)
+                    columns = csv_columns(uploaded) if fmt == "csv" else []
+                    if columns:
+                        text_field = st.selectbox(
+                            "Text column",
+                            columns,
+                            index=columns.index("text") if "text" in columns else 0,
+                            key=make_key(0, "sel", "sentiment_column")
+                        )
+                    else:
+                        text_field = st.text_input(
+                            "Text field", "text", key=make_key(0, "txt", "sentiment_field")
+                        )
+        if bulk_mode:
+            run = False
+            run_bulk = st.button(
+                "Score File", key=make_key(0, "btn", "sentiment_file"), disabled=not uploaded
             )
-        run = st.button("Sentiment Analysis", key=make_key(0, "btn", "sentiment"))
+        else:
+            run_bulk = False
+            run = st.button("Sentiment Analysis", key=make_key(0, "btn", "sentiment"))
     # Results 
     with right:
         with card("Sentiment Analysis Demo", muted=True):
-            if not st.session_state.get("sentiment_model_loaded"):
-                model_loading_notice("Multilingual Sentiment Model")
+            model_status = warmup_status("sentiment")
+            if model_status != "ready" and not st.session_state.get("sentiment_model_loaded"):
+                model_loading_notice("Multilingual Sentiment Model", model_status)
 
-            if run and raw_text.strip():
+            if (run or run_bulk) and model_status == "loading":
+                st.info("⏳ The model is still warming up. Please try again in a few seconds.")
+            elif run and raw_text.strip():
                 rate_limit("sentiment_run", 5)
 
                 lang = detect_language(raw_text)
-                label, score = analyze_sentiment(raw_text)
+                if long_mode:
+                    document = analyze_document(raw_text)
+                    label, score = document["label"], document["score"]
+                else:
+                    label, score = analyze_sentiment(raw_text)
                 st.session_state["sentiment_model_loaded"] = True
+                st.session_state["sentiment_last_run"] = {"text": raw_text, "lang": lang}
                 st.metric("Confidence Score", round(score, 3))
                 # st.markdown(sentiment_badge(label)) # with tabularisai/multilingual-sentiment-analysis
                 st.markdown(normalize_sentiment(label)) # with nlptown/bert-base-multilingual-uncased-sentiment
-                st.caption(f"Detected language: `{lang}`")
+                st.caption(f"Detected language: `{lang}` · Backend: `{SENTIMENT_BACKEND}`")
+                cache_stats = load_inference_cache().stats()
+                st.caption(
+                    f"Inference cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                    f"({cache_stats['entries']} entries)"
+                )
+            elif bulk_mode:
+                if run_bulk and model_status != "loading":
+                    rate_limit("sentiment_bulk_run", 5)
+                    previous = st.session_state.pop("sentiment_bulk_result", None)
+                    discard_output(previous and previous["path"])
+
+                    bar = st.progress(0.0, text="Scoring…")
+                    chart = st.empty()
+
+                    def on_chunk(rows, stars, fraction):
+                        bar.progress(fraction, text=f"Scored {rows:,} records")
+                        render_star_distribution(stars, chart)
+
+                    path, stars, rows = score_sentiment_file(uploaded, fmt, text_field, on_chunk)
+                    st.session_state["sentiment_model_loaded"] = True
+                    st.session_state["sentiment_bulk_result"] = {
+                        "path": path, "stars": dict(stars), "rows": rows, "name": uploaded.name,
+                    }
+                    bar.empty()
+                    chart.empty()
+
+                result = st.session_state.get("sentiment_bulk_result")
+                if result:
+                    st.metric("Records scored", f"{result['rows']:,}")
+                    render_star_distribution(Counter(result["stars"]))
+                    with open(result["path"], "rb") as f:
+                        st.download_button(
+                            "📥 Download annotated CSV",
+                            f,
+                            file_name=f"{result['name'].rsplit('.', 1)[0]}_sentiment.csv",
+                            mime="text/csv",
+                            key=make_key(0, "dl", "sentiment_file")
+                        )
+                else:
+                    st.info("Upload a CSV or JSONL file and click 'Score File'.")
             else:
                 st.info("Run 'Sentiment Analysis' to see results.")
                 with st.expander("ℹ️ About this tool"):
                     st.caption("This tool analyzes text sentiment using a lightweight multilingual AI model. Click *Analyze* to run sentiment detection and see see if it's positive 🙂 or negative 🙁.  A visual wordcloud display where frequently used words appear larger, helping you see which terms are driving the sentiment.")
                 
-    # Word Cloud
-    if run and raw_text.strip():
-        if st.checkbox("Show word cloud", value=True):
-            fade_block()
-            st.subheader("☁️ Word Cloud")
-            fig = generate_wordcloud(raw_text, lang)
-            st.pyplot(fig)
-            end()
+    # Per-window scores (long-document mode)
+    if run and raw_text.strip() and model_status != "loading" and long_mode:
+        st.subheader("🪟 Window Scores")
+        st.caption(
+            f"{len(document['windows'])} overlapping windows, aggregated by token count "
+            f"→ **{document['label']}**"
+        )
+        render_window_scores(raw_text, document["windows"])
+
+    # Word Cloud (kept for the last analyzed text, so toggling re-displays from cache)
+    last_run = st.session_state.get("sentiment_last_run")
+    if not bulk_mode and last_run:
+        if st.checkbox("Show word cloud", value=True, key=make_key(0, "chk", "wordcloud")):
+            png = generate_wordcloud(last_run["text"], last_run["lang"])
+            if png:
+                fade_block()
+                st.subheader("☁️ Word Cloud")
+                st.image(png, width="stretch")
+                end()
 
 # =================================================
 # TAB 2 — KEYWORD EXTRACTION
@@ -206,35 +463,102 @@ with tabs[1]:
     left, right = dashboard()
     with left:
         with card("🔑 Keyword Extraction", refreshable=False):
-            # default_text = "Barack Obama was born in Hawaii. He served as President of the United States."
-            samples = {
-                "Tech News": "Apple released a new iPhone model in 2025 with advanced AI features.",
-                "Sports": "Lionel Messi scored two goals in the Champions League final.",
-                "History": "The French Revolution began in 1789 and changed the course of European history."
-            }
-            raw_text = text_area_with_controls(
-                tab=1,
-                state_key="kw_text",
-                #default_text=default_text,
-                samples=samples,
-                show_default=False,  # hide default button
-                show_samples=True,   # show sample selector
-                show_reset=True
+            kw_mode = st.radio(
+                "Input",
+                ["Text", "Document collection"],
+                horizontal=True,
+                key=make_key(1, "radio", "kw_mode")
             )
-
-        if st.button("Extract Keywords", key=make_key(1, "btn", "extract")):
-            kws = extract_keywords(raw_text)
-            if kws:
-                st.success("✅ Extracted keywords")
-                for word, freq in kws:
-                    st.write(f"- **{word}** ({freq})")
+            if kw_mode == "Text":
+                # default_text = "Barack Obama was born in Hawaii. He served as President of the United States."
+                samples = {
+                    "Tech News": "Apple released a new iPhone model in 2025 with advanced AI features.",
+                    "Sports": "Lionel Messi scored two goals in the Champions League final.",
+                    "History": "The French Revolution began in 1789 and changed the course of European history."
+                }
+                raw_text = text_area_with_controls(
+                    tab=1,
+                    state_key="kw_text",
+                    #default_text=default_text,
+                    samples=samples,
+                    show_default=False,  # hide default button
+                    show_samples=True,   # show sample selector
+                    show_reset=True
+                )
             else:
-                st.warning("No keywords found. Try another text!")
+                kw_file = st.file_uploader(
+                    "Documents (TXT: one per line, CSV/JSONL: one per record)",
+                    type=["txt", "csv", "jsonl", "json"],
+                    key=make_key(1, "upl", "kw_file")
+                )
+                kw_field = "text"
+                if kw_file:
+                    kw_fmt = upload_format(kw_file.name)
+                    kw_columns = csv_columns(kw_file) if kw_fmt == "csv" else []
+                    if kw_columns:
+                        kw_field = st.selectbox(
+                            "Text column",
+                            kw_columns,
+                            index=kw_columns.index("text") if "text" in kw_columns else 0,
+                            key=make_key(1, "sel", "kw_column")
+                        )
+
+            cols = st.columns(2)
+            kw_method = cols[0].selectbox(
+                "Scoring", ["BM25", "TF-IDF"], key=make_key(1, "sel", "kw_method")
+            ).lower().replace("-", "")
+            kw_top_n = cols[1].slider("Keywords per document", 3, 15, 5, key=make_key(1, "sld", "kw_top_n"))
+
+        if kw_mode == "Text":
+            if st.button("Extract Keywords", key=make_key(1, "btn", "extract")):
+                kws = extract_keywords(raw_text, kw_top_n, kw_method) if raw_text.strip() else []
+                if kws:
+                    st.success("✅ Extracted keywords")
+                    for word, score in kws:
+                        st.write(f"- **{word}** ({score:.2f})")
+                else:
+                    st.warning("No keywords found. Try another text!")
+        elif st.button("Index & Extract", key=make_key(1, "btn", "extract_collection"), disabled=not kw_file):
+            previous = st.session_state.pop("kw_collection_result", None)
+            discard_output(previous and previous["path"])
+            bar = st.progress(0.0, text="Indexing…")
+            path, corpus, docs = extract_collection_keywords(
+                kw_file, kw_fmt, kw_field, kw_top_n, kw_method,
+                on_chunk=lambda n, fraction: bar.progress(fraction, text=f"Indexed {n:,} documents"),
+            )
+            bar.empty()
+            st.session_state["kw_collection_result"] = {
+                "path": path, "corpus": corpus, "docs": docs, "name": kw_file.name,
+            }
+
+        result = st.session_state.get("kw_collection_result")
+        if kw_mode != "Text" and result:
+            st.success(f"✅ Extracted keywords for {result['docs']:,} documents")
+            st.markdown("### Collection keywords")
+            st.dataframe(
+                pd.DataFrame(result["corpus"], columns=["Keyword", "Total score"]),
+                hide_index=True,
+                use_container_width=True
+            )
+            with open(result["path"], "rb") as f:
+                st.download_button(
+                    "📥 Download per-document keywords (CSV)",
+                    f,
+                    file_name=f"{result['name'].rsplit('.', 1)[0]}_keywords.csv",
+                    mime="text/csv",
+                    key=make_key(1, "dl", "kw_collection")
+                )
     with right:
         with card("Keyword Extraction Demo", muted=True):
-            st.info("Run 'Keyword Extraction' to see results.")
+            index = get_keyword_index()
+            st.metric("Indexed documents", f"{len(index):,}")
+            st.caption(f"Vocabulary: {len(index.terms):,} terms")
+            if st.button("Reset index", key=make_key(1, "btn", "kw_reset")):
+                del st.session_state["keyword_index"]
+                st.session_state.pop("kw_collection_result", None)
+                st.rerun()
             with st.expander("ℹ️ About this tool"):
-                st.caption("This demo extracts keywords by counting word frequencies, excluding common stopwords. The top keywords are displayed with their occurrence counts. This tool finds the most frequent, meaningful words in text. Useful for summarizing content themes and indexing documents.")
+                st.caption("This demo ranks keywords with TF-IDF or BM25 against a document-frequency index that grows with every text and collection you analyze, so common words of your corpus are weighted down. Stopwords are removed for English, French, German and Spanish, and Chinese text is segmented with jieba. Upload a collection to score thousands of documents in one pass.")
 
 # =================================================
 # TAB 3 — ENTITY RECOGNITION (PLACEHOLDER)
@@ -244,55 +568,109 @@ with tabs[2]:
     left, right = dashboard()
     with left:
         with card("🔎 Entity Recognition (NER)", refreshable=False):
-            # default_text = "Barack Obama was born in 1961 and served as President of the United States."
-            samples = {
-                "Tech News": "Apple released a new iPhone model in 2025 with advanced AI features.",
-                "Sports": "Lionel Messi scored two goals in the Champions League final.",
-                "History": "The French Revolution began in 1789 and changed the course of European history."
-            }
-            raw_text = text_area_with_controls(
-                tab=2,
-                state_key="ner_text",
-                #default_text=default_text,
-                samples=samples,
-                show_default=False,  # hide default button
-                show_samples=True,   # show sample selector
-                show_reset=True
+            ner_mode = st.radio(
+                "Input",
+                ["Text", "Corpus upload"],
+                horizontal=True,
+                key=make_key(2, "radio", "ner_mode")
             )
+            if ner_mode == "Text":
+                # default_text = "Barack Obama was born in 1961 and served as President of the United States."
+                samples = {
+                    "Tech News": "Apple released a new iPhone model in 2025 with advanced AI features.",
+                    "Sports": "Lionel Messi scored two goals in the Champions League final.",
+                    "History": "The French Revolution began in 1789 and changed the course of European history."
+                }
+                raw_text = text_area_with_controls(
+                    tab=2,
+                    state_key="ner_text",
+                    #default_text=default_text,
+                    samples=samples,
+                    show_default=False,  # hide default button
+                    show_samples=True,   # show sample selector
+                    show_reset=True
+                )
+            else:
+                ner_file = st.file_uploader(
+                    "Corpus (TXT: one document per line, JSONL: {\"id\", \"text\"} per line)",
+                    type=["txt", "jsonl", "json"],
+                    key=make_key(2, "upl", "ner_file")
+                )
+                ner_out_fmt = st.radio(
+                    "Export format", ["csv", "jsonl"], horizontal=True,
+                    format_func=str.upper, key=make_key(2, "radio", "ner_out_fmt")
+                )
 
-        if st.button("Recognize Entities", key=make_key(2, "btn", "recognize")):
-            entities = simple_ner(raw_text)
-            if entities:
-                st.success(f"✅ Found {len(entities)} entities")
-
-                # Legend
-                st.markdown("""
-                **Legend:**
-                - <span style='background-color:#FFD700; padding:2px; border-radius:3px;'>Gold</span> → Proper Noun  
-                - <span style='background-color:#87CEEB; padding:2px; border-radius:3px;'>Blue</span> → Number  
-                - <span style='background-color:#90EE90; padding:2px; border-radius:3px;'>Green</span> → Year  
-                """, unsafe_allow_html=True)
-
-                # Highlighted text
-                highlighted = highlight_entities(raw_text, entities)
-                st.markdown("### Highlighted Text")
-                st.markdown(highlighted, unsafe_allow_html=True)
-
-                # Table view
-                st.markdown("### Entity Table")
-                df = pd.DataFrame(entities, columns=["Entity", "Type"])
-                st.table(df)
-
-                # Download option
-                csv = df.to_csv(index=False).encode("utf-8")
+        if ner_mode == "Text":
+            if st.button("Recognize Entities", key=make_key(2, "btn", "recognize")):
+                entities = simple_ner(raw_text)
+                if entities:
+                    st.success(f"✅ Found {len(entities)} entities")
+
+                    # Legend
+                    st.markdown("""
+                    **Legend:**
+                    - <span style='background-color:#FFD700; padding:2px; border-radius:3px;'>Gold</span> → Proper Noun  
+                    - <span style='background-color:#87CEEB; padding:2px; border-radius:3px;'>Blue</span> → Number  
+                    - <span style='background-color:#90EE90; padding:2px; border-radius:3px;'>Green</span> → Year  
+                    """, unsafe_allow_html=True)
+
+                    # Highlighted text
+                    highlighted = highlight_entities(raw_text, entities)
+                    st.markdown("### Highlighted Text")
+                    st.markdown(highlighted, unsafe_allow_html=True)
+
+                    # Table view
+                    st.markdown("### Entity Table")
+                    df = pd.DataFrame(
+                        [(e.text, e.label, e.start, e.end) for e in entities],
+                        columns=["Entity", "Type", "Start", "End"]
+                    )
+                    st.dataframe(df, hide_index=True, use_container_width=True)
+
+                    # Download option
+                    csv = df.to_csv(index=False).encode("utf-8")
+                    st.download_button(
+                        label="📥 Download Entities as CSV",
+                        data=csv,
+                        file_name="entities.csv",
+                        mime="text/csv"
+                    )
+                else:
+                    st.warning("No entities found. Try another text!")
+        elif st.button("Scan Corpus", key=make_key(2, "btn", "scan_corpus"), disabled=not ner_file):
+            previous = st.session_state.pop("ner_corpus_result", None)
+            discard_output(previous and previous["path"])
+            bar = st.progress(0.0, text="Scanning…")
+            chart = st.empty()
+
+            def on_chunk(docs, counts, fraction):
+                bar.progress(fraction, text=f"Scanned {docs:,} documents")
+                chart.bar_chart(pd.Series(dict(counts), name="Entities"))
+
+            path, counts, docs = scan_corpus(ner_file, upload_format(ner_file.name), ner_out_fmt, on_chunk)
+            bar.empty()
+            chart.empty()
+            st.session_state["ner_corpus_result"] = {
+                "path": path, "counts": dict(counts), "docs": docs,
+                "name": ner_file.name, "fmt": ner_out_fmt,
+            }
+
+        result = st.session_state.get("ner_corpus_result")
+        if ner_mode != "Text" and result:
+            st.success(
+                f"✅ Found {sum(result['counts'].values()):,} entities in {result['docs']:,} documents"
+            )
+            if result["counts"]:
+                st.bar_chart(pd.Series(result["counts"], name="Entities"))
+            with open(result["path"], "rb") as f:
                 st.download_button(
-                    label="📥 Download Entities as CSV",
-                    data=csv,
-                    file_name="entities.csv",
-                    mime="text/csv"
+                    f"📥 Download entity rows ({result['fmt'].upper()})",
+                    f,
+                    file_name=f"{result['name'].rsplit('.', 1)[0]}_entities.{result['fmt']}",
+                    mime="text/csv" if result["fmt"] == "csv" else "application/json",
+                    key=make_key(2, "dl", "ner_corpus")
                 )
-            else:
-                st.warning("No entities found. Try another text!")
 
     with right:
         with card("Entity Recognition Demo", muted=True):
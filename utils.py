@@ -4,6 +4,9 @@
 import streamlit as st
 import time
 
+from ls_ui.env import DATABASE_URL
+from ls_nlp.asset_store import AssetStore, sqlite_path
+
 # Generate unique keys for Streamlit widgets
 def make_key(tab: int, widget: str, purpose: str) -> str:
     """
@@ -130,11 +133,34 @@ def guarded_action(key: str, cooldown: int, max_chars: int, text: str):
     return True
 
 # Model loading notice
-def model_loading_notice(label: str):
-    st.info(
-        f"🔄**{label}**: This model is loaded on first use. Subsequent runs are instant.",
-        icon="⚡"
-    )
+def model_loading_notice(label: str, status: str = None):
+    """
+    Inform users about model availability.
+    status: background warm-up state ("loading", "failed"), or None when no warm-up runs.
+    """
+    if status == "loading":
+        st.info(
+            f"🔄**{label}**: The model is warming up in the background. It will be ready in a few seconds.",
+            icon="⏳"
+        )
+    elif status == "failed":
+        st.warning(
+            f"**{label}**: Background warm-up failed. The model will be loaded on first use.",
+            icon="⚠️"
+        )
+    else:
+        st.info(
+            f"🔄**{label}**: This model is loaded on first use. Subsequent runs are instant.",
+            icon="⚡"
+        )
+
+
+# Persistent TM & glossary store
+@st.cache_resource(show_spinner=False)
+def load_asset_store() -> AssetStore:
+    """SQLite asset store at LS_DATABASE_URL, one per process (pooled read connections)."""
+    return AssetStore(sqlite_path(DATABASE_URL))
+
 # Tighten block container spacing
 def tighten_bloc_container():
     st.markdown(